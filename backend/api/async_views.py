@@ -0,0 +1,332 @@
+"""Асинхронные представления для read-heavy эндпоинтов.
+
+Используются при запуске проекта под ASGI-сервером (``ASYNC_READ_VIEWS``):
+чтение данных идет через асинхронный ORM, а изменяющие запросы
+делегируются обычным viewset'ам DRF.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+)
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api import metrics
+from api.authentication import CachedTokenAuthentication
+from api.events import Subscription, backend, broker, get_ticket_user_id
+from api.paginations import PageAndLimitPagination
+from api.projections import arecipes_to_dicts
+from api.views import IngredientViewSet, RecipeViewSet
+from recipes.models import Favorite, Ingredient, Tag
+from users.models import UserSubscription
+
+User = get_user_model()
+
+JSON_DUMPS_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+recipe_list_view = RecipeViewSet.as_view(
+    {'get': 'list', 'post': 'create'},
+)
+recipe_detail_view = RecipeViewSet.as_view(
+    {
+        'get': 'retrieve',
+        'put': 'update',
+        'patch': 'partial_update',
+        'delete': 'destroy',
+    },
+)
+
+
+def json_response(data, status=200) -> JsonResponse:
+    """Ответ в том же компактном виде, что и JSONRenderer DRF."""
+    return JsonResponse(
+        data,
+        status=status,
+        safe=False,
+        json_dumps_params=JSON_DUMPS_PARAMS,
+    )
+
+
+def not_found() -> JsonResponse:
+    return json_response({'detail': str(NotFound.default_detail)}, 404)
+
+
+def error_response(exc: APIException) -> JsonResponse:
+    """Ответ об ошибке в формате обработчика исключений DRF."""
+    if isinstance(exc.detail, (list, dict)):
+        return json_response(exc.detail, exc.status_code)
+    return json_response({'detail': exc.detail}, exc.status_code)
+
+
+def prepare_view(viewset_class, request, action, **kwargs):
+    """Инициализация viewset'а: аутентификация, права и фильтрация.
+
+    Выполняется синхронно, так как DRF не поддерживает async-представления.
+    """
+    view = viewset_class(
+        action=action,
+        args=(),
+        kwargs=kwargs,
+        format_kwarg=None,
+        action_map={'get': action},
+        headers={},
+    )
+    view.request = view.initialize_request(request, **kwargs)
+    view.initial(view.request, **kwargs)
+    return view, view.filter_queryset(view.get_queryset())
+
+
+async def paginate(request, queryset):
+    """Асинхронный аналог PageAndLimitPagination.
+
+    Возвращает список объектов страницы и функцию оборачивания данных
+    в ответ с полями count/next/previous.
+    """
+    paginator = PageAndLimitPagination()
+    limit = request.GET.get(paginator.page_size_query_param)
+    try:
+        page_size = int(limit) if limit else None
+    except ValueError:
+        page_size = None
+    if not page_size or page_size < 1:
+        return [obj async for obj in queryset], lambda data: data
+
+    count = await queryset.acount()
+    try:
+        page = int(request.GET.get(paginator.page_query_param, 1))
+    except ValueError:
+        page = 0
+    num_pages = max(1, -(-count // page_size))
+    if page < 1 or page > num_pages:
+        raise Http404(str(paginator.invalid_page_message).format(
+            page_number=page, message='',
+        ))
+    offset = (page - 1) * page_size
+    objects = [obj async for obj in queryset[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    param = paginator.page_query_param
+    next_url = (
+        replace_query_param(url, param, page + 1)
+        if page < num_pages else None
+    )
+    if page <= 1:
+        previous_url = None
+    elif page == 2:
+        previous_url = remove_query_param(url, param)
+    else:
+        previous_url = replace_query_param(url, param, page - 1)
+
+    def wrap(data):
+        return {
+            'count': count,
+            'next': next_url,
+            'previous': previous_url,
+            'results': data,
+        }
+
+    return objects, wrap
+
+
+def tag_to_dict(tag: Tag) -> dict:
+    return {
+        'id': tag.id,
+        'name': tag.name,
+        'color': tag.color,
+        'slug': tag.slug,
+    }
+
+
+def ingredient_to_dict(ingredient: Ingredient) -> dict:
+    return {
+        'id': ingredient.id,
+        'name': ingredient.name,
+        'measurement_unit': ingredient.measurement_unit,
+    }
+
+
+async def tag_list(request):
+    """Список тегов."""
+    return json_response([tag_to_dict(tag) async for tag in Tag.objects.all()])
+
+
+async def tag_detail(request, pk):
+    """Получение тега по id."""
+    try:
+        tag = await Tag.objects.aget(pk=pk)
+    except Tag.DoesNotExist:
+        return not_found()
+    return json_response(tag_to_dict(tag))
+
+
+async def ingredient_list(request):
+    """Список ингредиентов с поиском по началу названия."""
+    _, queryset = await sync_to_async(prepare_view)(
+        IngredientViewSet, request, 'list',
+    )
+    return json_response(
+        [ingredient_to_dict(obj) async for obj in queryset],
+    )
+
+
+async def ingredient_detail(request, pk):
+    """Получение ингредиента по id."""
+    try:
+        ingredient = await Ingredient.objects.aget(pk=pk)
+    except Ingredient.DoesNotExist:
+        return not_found()
+    return json_response(ingredient_to_dict(ingredient))
+
+
+async def recipe_list(request):
+    """Список рецептов; создание рецепта обрабатывает RecipeViewSet."""
+    if request.method not in SAFE_METHODS:
+        return await sync_to_async(recipe_list_view)(request)
+    try:
+        view, queryset = await sync_to_async(prepare_view)(
+            RecipeViewSet, request, 'list',
+        )
+    except APIException as exc:
+        return error_response(exc)
+    try:
+        ids, wrap = await paginate(
+            request, queryset.values_list('id', flat=True),
+        )
+    except Http404 as exc:
+        return json_response({'detail': str(exc)}, 404)
+    user = view.request.user
+    return json_response(
+        wrap(await arecipes_to_dicts(request, user, ids)),
+    )
+
+
+async def recipe_detail(request, pk):
+    """Получение рецепта; изменение и удаление обрабатывает RecipeViewSet."""
+    if request.method not in SAFE_METHODS:
+        return await sync_to_async(recipe_detail_view)(request, pk=pk)
+    try:
+        view, queryset = await sync_to_async(prepare_view)(
+            RecipeViewSet, request, 'retrieve', pk=pk,
+        )
+    except APIException as exc:
+        return error_response(exc)
+    if not await queryset.filter(pk=pk).aexists():
+        return not_found()
+    data = await arecipes_to_dicts(request, view.request.user, [pk])
+    return json_response(data[0])
+
+
+async def get_event_topics(user) -> set:
+    """Темы авторов из подписок и рецептов из избранного пользователя."""
+    topics = {
+        f'author:{author_id}'
+        async for author_id in UserSubscription.objects.filter(
+            user=user,
+        ).values_list('author_id', flat=True)
+    }
+    topics.update([
+        f'recipe:{recipe_id}'
+        async for recipe_id in Favorite.objects.filter(
+            user=user,
+        ).values_list('recipe_id', flat=True)
+    ])
+    return topics
+
+
+def format_event(event) -> str:
+    return 'event: {}\ndata: {}\n\n'.format(
+        event['type'], json.dumps(event, separators=(',', ':')),
+    )
+
+
+async def event_stream(user):
+    """События для пользователя и пинги раз в EVENTS_KEEPALIVE секунд.
+
+    Темы обновляются с той же периодичностью, чтобы учитывать новые
+    подписки. Через EVENTS_STREAM_TIMEOUT секунд поток завершается,
+    и EventSource переподключается с повторной проверкой токена.
+    """
+    subscription = Subscription(())
+    backend.start()
+    metrics.incr('events_streams')
+    now = time.monotonic()
+    deadline = now + settings.EVENTS_STREAM_TIMEOUT
+    refresh_at = now
+    try:
+        yield f'retry: {settings.EVENTS_RETRY * 1000}\n\n'
+        while time.monotonic() < deadline:
+            if time.monotonic() >= refresh_at:
+                broker.subscribe(subscription, await get_event_topics(user))
+                refresh_at = time.monotonic() + settings.EVENTS_KEEPALIVE
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    max(refresh_at - time.monotonic(), 0),
+                )
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def events(request):
+    """Поток server-sent events о рецептах авторов и избранного.
+
+    Токен принимается только в заголовке Authorization. EventSource
+    заголовки не передает, поэтому подключается с билетом из
+    /api/events/ticket/ в параметре ticket; после истечения билета
+    для переподключения запрашивается новый.
+    """
+    header = request.headers.get('Authorization', '').split()
+    if len(header) == 2 and header[0] == 'Token':
+        try:
+            user, _ = await sync_to_async(
+                CachedTokenAuthentication().authenticate_credentials,
+            )(header[1])
+        except AuthenticationFailed as exc:
+            return error_response(exc)
+    elif 'ticket' in request.GET:
+        user_id = get_ticket_user_id(request.GET['ticket'])
+        user = user_id and await User.objects.filter(
+            pk=user_id, is_active=True, is_deleted=False,
+        ).only('pk').afirst()
+        if not user:
+            return error_response(AuthenticationFailed(
+                'Недействительный или просроченный билет.',
+            ))
+    else:
+        return error_response(NotAuthenticated())
+    response = StreamingHttpResponse(
+        event_stream(user), content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Функции объявлены как async, поэтому csrf_exempt выставляется напрямую:
+# декоратор в Django 4.2 превращает их в синхронные представления.
+recipe_list.csrf_exempt = True
+recipe_detail.csrf_exempt = True
+
+for async_view in (
+    tag_list,
+    tag_detail,
+    ingredient_list,
+    ingredient_detail,
+    recipe_list,
+    recipe_detail,
+):
+    async_view.replica_reads = True
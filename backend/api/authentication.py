@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router, transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from api import metrics
+
+User = get_user_model()
+
+# Поля пользователя в записи кэша, в порядке полей модели.
+USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in ('id', 'is_superuser', 'is_staff', 'is_active')
+)
+
+
+class TokenCache:
+    """LRU-кэш записей токенов с ограниченным временем жизни."""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            expires, entry = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return entry
+
+    def set(self, key, entry) -> None:
+        with self.lock:
+            self.items[key] = (time.monotonic() + self.ttl, entry)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self.lock:
+            self.items.pop(key, None)
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+def shared_cache_key(key: str) -> str:
+    return f'auth_token_user:{key}'
+
+
+def invalidate_token(key: str) -> None:
+    """Удаление токена из кэша воркера и общего кэша."""
+    token_cache.delete(key)
+    if settings.TOKEN_CACHE_SHARED:
+        cache.delete(shared_cache_key(key))
+
+
+def invalidate_tokens(keys) -> None:
+    """Сброс токенов сейчас и после фиксации транзакции.
+
+    Запрос, прочитавший пользователя до фиксации, мог снова положить
+    в кэш старые данные.
+    """
+    keys = list(keys)
+    for key in keys:
+        invalidate_token(key)
+    transaction.on_commit(lambda: [invalidate_token(key) for key in keys])
+
+
+def get_cached(key):
+    if settings.TOKEN_CACHE_SHARED:
+        return cache.get(shared_cache_key(key))
+    if settings.TOKEN_CACHE_LOCAL:
+        return token_cache.get(key)
+    return None
+
+
+def set_cached(key, entry) -> None:
+    if settings.TOKEN_CACHE_SHARED:
+        cache.set(shared_cache_key(key), entry, settings.TOKEN_CACHE_TTL)
+    elif settings.TOKEN_CACHE_LOCAL:
+        token_cache.set(key, entry)
+
+
+def from_entry(key, entry):
+    """Новые объекты пользователя и токена для запроса.
+
+    Загружены только id и флаги, остальные поля читаются из базы при
+    первом обращении. save() такого пользователя записывает только
+    загруженные и измененные поля.
+    """
+    user = User.from_db(router.db_for_write(User), USER_FIELDS, entry)
+    return (user, Token(key=key, user=user))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к БД для недавно виденных токенов.
+
+    Записи (id и флаги пользователя) хранятся в общем кэше Django при
+    TOKEN_CACHE_SHARED, иначе в LRU-кэше процесса, если сервер работает
+    в одном процессе (TOKEN_CACHE_LOCAL). Сброс записи в памяти одного
+    воркера не дошел бы до остальных, и выход или деактивация
+    пользователя действовали бы только через TOKEN_CACHE_TTL. Записи
+    сбрасываются при удалении токена (выход через djoser) и изменении
+    пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = get_cached(key)
+        if entry is not None:
+            metrics.incr('token_cache_hits')
+            user, token = from_entry(key, entry)
+            if not user.is_active:
+                raise AuthenticationFailed(
+                    'Учетная запись отключена или удалена.',
+                )
+            return (user, token)
+
+        metrics.incr('token_cache_misses')
+        user, token = super().authenticate_credentials(key)
+        set_cached(key, tuple(getattr(user, name) for name in USER_FIELDS))
+        return (user, token)
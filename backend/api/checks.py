@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import connections
+from django.db.utils import OperationalError
+
+from api.querycheck import MODES
+
+
+@register()
+def check_database_settings(app_configs, **kwargs):
+    """Проверка настроек постоянных соединений и пула."""
+    errors = []
+    for alias, settings_dict in settings.DATABASES.items():
+        conn_max_age = settings_dict.get('CONN_MAX_AGE', 0)
+        persistent = conn_max_age is None or conn_max_age > 0
+        pool_size = settings_dict.get('POOL_SIZE')
+        if (
+            (persistent or pool_size)
+            and not settings_dict.get('CONN_HEALTH_CHECKS')
+        ):
+            errors.append(Warning(
+                f'{alias}: постоянные соединения или пул без '
+                'CONN_HEALTH_CHECKS не переживут перезапуск базы данных.',
+                hint='Установите DB_CONN_HEALTH_CHECKS=True.',
+                id='api.W001',
+            ))
+        if pool_size and conn_max_age != 0:
+            errors.append(Warning(
+                f'{alias}: при пуле соединений CONN_MAX_AGE должен быть 0, '
+                'иначе соединения не возвращаются в пул между запросами.',
+                hint='Установите DB_CONN_MAX_AGE=0.',
+                id='api.W002',
+            ))
+        if pool_size and pool_size < settings.WEB_THREADS:
+            errors.append(Warning(
+                f'{alias}: размер пула соединений {pool_size} меньше '
+                f'числа потоков воркера {settings.WEB_THREADS}, потоки '
+                'будут ждать свободное соединение.',
+                hint='Увеличьте DB_POOL_SIZE или уменьшите GUNICORN_THREADS.',
+                id='api.W005',
+            ))
+    return errors
+
+
+@register(Tags.database)
+def check_database_availability(app_configs, databases=None, **kwargs):
+    """Доступность БД: проверяется командами с --database и при старте
+    gunicorn (when_ready).
+    """
+    errors = []
+    for alias in databases or []:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except OperationalError as error:
+            errors.append(Warning(
+                f'{alias}: база данных недоступна: {error}',
+                id='api.W003',
+            ))
+    return errors
+
+
+@register()
+def check_strict_queries(app_configs, **kwargs):
+    """Проверка режима поиска N+1 запросов."""
+    if settings.STRICT_QUERIES in MODES:
+        return []
+    return [Error(
+        f'Неизвестный режим STRICT_QUERIES: {settings.STRICT_QUERIES!r}.',
+        hint='Допустимые значения: raise, log или пустая строка.',
+        id='api.E001',
+    )]
+
+
+@register()
+def check_token_cache(app_configs, **kwargs):
+    """Общий кэш токенов должен быть общим для всех воркеров."""
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.TOKEN_CACHE_SHARED and backend.endswith((
+        'LocMemCache', 'DummyCache',
+    )):
+        return [Warning(
+            'TOKEN_CACHE_SHARED включен, но кэш Django хранится в памяти '
+            'процесса: выход и деактивация пользователя не дойдут до '
+            'других воркеров.',
+            hint='Задайте общий CACHE_BACKEND, например Redis.',
+            id='api.W004',
+        )]
+    return []
+
+
+@register()
+def check_events_backend(app_configs, **kwargs):
+    """Поток событий должен доходить до всех воркеров."""
+    if (
+        settings.WEB_CONCURRENCY > 1
+        and settings.EVENTS_BACKEND == 'api.events.LocalBackend'
+    ):
+        return [Warning(
+            'EVENTS_BACKEND доставляет события только внутри процесса, '
+            f'а воркеров {settings.WEB_CONCURRENCY}: подписчики других '
+            'воркеров не получат события.',
+            hint='Установите EVENTS_BACKEND=api.events.PostgresBackend.',
+            id='api.W006',
+        )]
+    return []
@@ -0,0 +1,184 @@
+"""Уведомления клиентов о новых и измененных рецептах (server-sent events).
+
+События публикуются в темы: author:<id> - новый рецепт автора,
+recipe:<id> - изменение или удаление рецепта. Поток /api/events/
+подписан на темы авторов, на которых подписан пользователь, и рецептов
+из его избранного (api.async_views.events), поэтому клиенту не нужно
+опрашивать списки.
+
+EventSource не передает заголовки, поэтому вместо токена в строке
+запроса передается короткоживущий билет из POST /api/events/ticket/:
+токен не попадает в логи сервера и историю браузера.
+
+Доставка между процессами выполняется бэкендом EVENTS_BACKEND:
+LocalBackend - только в текущем процессе, PostgresBackend - через
+LISTEN/NOTIFY основной базы для нескольких воркеров.
+"""
+import asyncio
+import json
+import select
+import threading
+import time
+from collections import defaultdict
+
+import psycopg2
+from django.conf import settings
+from django.core import signing
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+from api import metrics
+
+TICKET_SALT = 'api.events.ticket'
+
+
+def make_ticket(user) -> str:
+    """Подписанный билет для подключения пользователя к потоку."""
+    return signing.dumps(user.pk, salt=TICKET_SALT)
+
+
+def get_ticket_user_id(ticket):
+    """id пользователя из билета, None для неверного или просроченного."""
+    try:
+        return signing.loads(
+            ticket, salt=TICKET_SALT, max_age=settings.EVENTS_TICKET_MAX_AGE,
+        )
+    except signing.BadSignature:
+        return None
+
+
+class Subscription:
+    """Очередь событий одного потока, заполняемая из любых потоков."""
+
+    def __init__(self, topics):
+        self.topics = set(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(settings.EVENTS_QUEUE_SIZE)
+
+    def put(self, event) -> None:
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            metrics.incr('events_dropped')
+
+
+class Broker:
+    """Распределение событий по подпискам процесса."""
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, subscription, topics) -> None:
+        with self.lock:
+            for topic in subscription.topics - set(topics):
+                self.subscriptions[topic].discard(subscription)
+                if not self.subscriptions[topic]:
+                    del self.subscriptions[topic]
+            for topic in topics:
+                self.subscriptions[topic].add(subscription)
+            subscription.topics = set(topics)
+
+    def unsubscribe(self, subscription) -> None:
+        self.subscribe(subscription, ())
+
+    def dispatch(self, topic, event) -> None:
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+broker = Broker()
+
+
+class LocalBackend:
+    """Доставка событий только подписчикам текущего процесса."""
+
+    def start(self) -> None:
+        pass
+
+    def publish(self, topic, event) -> None:
+        broker.dispatch(topic, event)
+
+
+class PostgresBackend(LocalBackend):
+    """Доставка событий всем процессам через LISTEN/NOTIFY PostgreSQL.
+
+    Каждый процесс держит одно соединение, слушающее канал, в фоновом
+    потоке и передает полученные события своему брокеру.
+    """
+
+    channel = 'foodgram_events'
+
+    def __init__(self):
+        self.started = False
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+        threading.Thread(target=self.listen, daemon=True).start()
+
+    def publish(self, topic, event) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)',
+                [self.channel, json.dumps({'topic': topic, 'event': event})],
+            )
+
+    def listen(self) -> None:
+        params = connections['default'].get_connection_params()
+        # Отдельное соединение, а не из пула backend.postgresql_pool.
+        params.pop('pool_size', None)
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**params)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.channel}')
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        message = json.loads(conn.notifies.pop(0).payload)
+                        broker.dispatch(message['topic'], message['event'])
+            except Exception:
+                metrics.incr('events_listener_errors')
+                if conn is not None:
+                    conn.close()
+                time.sleep(1)
+
+
+backend = import_string(settings.EVENTS_BACKEND)()
+
+
+def publish(topic, event) -> None:
+    """Отправка события подписчикам после фиксации транзакции."""
+    def send():
+        metrics.incr('events_published')
+        backend.publish(topic, event)
+
+    transaction.on_commit(send)
+
+
+def publish_recipe_created(recipe) -> None:
+    publish(f'author:{recipe.author_id}', {
+        'type': 'recipe_created',
+        'recipe_id': recipe.id,
+        'author_id': recipe.author_id,
+    })
+
+
+def publish_recipe_changed(recipe_id, deleted=False) -> None:
+    publish(f'recipe:{recipe_id}', {
+        'type': 'recipe_deleted' if deleted else 'recipe_updated',
+        'recipe_id': recipe_id,
+    })
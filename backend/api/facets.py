@@ -0,0 +1,105 @@
+"""Количество рецептов по тегам для панели фильтров."""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q
+from django_filters import utils
+
+from api.filters import RecipeFilter
+from recipes.models import Favorite, Recipe, Tag, UsersCart
+
+TAGS_CACHE_KEY = 'facets:tags'
+# Параметры запроса, не влияющие на выборку рецептов.
+IGNORED_PARAMS = ('page', 'limit', 'ordering', 'fields', 'expand')
+
+
+def get_tags() -> list:
+    """Пары (id, slug) всех тегов.
+
+    Кэш сбрасывается сигналами при изменении тегов.
+    """
+    tags = cache.get(TAGS_CACHE_KEY)
+    if tags is None:
+        tags = list(Tag.objects.order_by('id').values_list('id', 'slug'))
+        cache.set(TAGS_CACHE_KEY, tags, None)
+    return tags
+
+
+def invalidate_tags() -> None:
+    cache.delete(TAGS_CACHE_KEY)
+
+
+def get_cache_key(user, params) -> str:
+    """Ключ кэша по пользователю и отсортированным параметрам фильтров."""
+    signature = '&'.join(
+        f'{name}={",".join(sorted(params.getlist(name)))}'
+        for name in sorted(params)
+    )
+    return 'facets:{}:{}'.format(
+        user.pk or 0, hashlib.sha1(signature.encode()).hexdigest(),
+    )
+
+
+def count_facets(request) -> dict:
+    """Число рецептов по каждому тегу, в избранном и в списке покупок.
+
+    Фильтр по тегам при подсчете по тегам не учитывается, чтобы выбор
+    тега не обнулял остальные. Общие числа считаются одним запросом
+    с условными агрегатами, числа по тегам - одной группировкой связей
+    рецептов с тегами.
+    """
+    params = request.query_params.copy()
+    for name in IGNORED_PARAMS:
+        params.pop(name, None)
+    key = get_cache_key(request.user, params)
+    facets = cache.get(key)
+    if facets is not None:
+        return facets
+
+    selected = params.pop('tags', [])
+    filterset = RecipeFilter(
+        params, queryset=Recipe.objects.all(), request=request,
+    )
+    if not filterset.is_valid():
+        raise utils.translate_validation(filterset.errors)
+
+    recipe_tags = Recipe.tags.through.objects.filter(recipe=OuterRef('pk'))
+    in_selected = (
+        Q(Exists(recipe_tags.filter(tag__slug__in=selected)))
+        if selected else Q()
+    )
+    recipes = filterset.qs.order_by()
+    aggregates = {
+        'count': Count('id', filter=in_selected) if selected else Count('id'),
+    }
+    if request.user.is_authenticated:
+        for name, model in (
+            ('is_favorited', Favorite),
+            ('is_in_shopping_cart', UsersCart),
+        ):
+            aggregates[name] = Count('id', filter=in_selected & Q(Exists(
+                model.objects.filter(
+                    user=request.user, recipe=OuterRef('pk'),
+                ),
+            )))
+    result = recipes.aggregate(**aggregates)
+    tag_counts = dict(
+        Recipe.tags.through.objects
+        .filter(recipe_id__in=recipes.values('id'))
+        .values('tag_id')
+        .annotate(count=Count('recipe_id', distinct=True))
+        .values_list('tag_id', 'count'),
+    )
+
+    facets = {
+        'count': result['count'],
+        'is_favorited': result.get('is_favorited', 0),
+        'is_in_shopping_cart': result.get('is_in_shopping_cart', 0),
+        'tags': [
+            {'id': tag_id, 'slug': slug, 'count': tag_counts.get(tag_id, 0)}
+            for tag_id, slug in get_tags()
+        ],
+    }
+    cache.set(key, facets, settings.FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,38 @@
+"""Параметры fields и expand для сокращенных ответов.
+
+fields - поля ответа через запятую (id выводится всегда), expand -
+вложенные объекты, которые выводятся целиком. Без expand вложенные
+объекты выводятся целиком, как и раньше, с пустым expand - только их id.
+"""
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_names(request, param):
+    """Список имен из параметра запроса или None, если его нет."""
+    if param not in request.GET:
+        return None
+    return {
+        name.strip()
+        for value in request.GET.getlist(param)
+        for name in value.split(',')
+        if name.strip()
+    }
+
+
+def requested_fields(request, available) -> tuple:
+    """Запрошенные поля из available в порядке available."""
+    names = parse_names(request, FIELDS_PARAM)
+    if not names:
+        return tuple(available)
+    return tuple(
+        name for name in available if name == 'id' or name in names
+    )
+
+
+def expanded_fields(request, nested) -> set:
+    """Вложенные поля из nested, которые выводятся целиком."""
+    names = parse_names(request, EXPAND_PARAM)
+    if names is None:
+        return set(nested)
+    return set(nested) & names
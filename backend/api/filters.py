@@ -1,10 +1,24 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Case, F, IntegerField, Value, When
 from django_filters.rest_framework import FilterSet
 from django_filters.rest_framework.filters import (
+    BaseInFilter,
     BooleanFilter,
+    CharFilter,
     ModelMultipleChoiceFilter,
+    NumberFilter,
 )
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 
-from recipes.models import Recipe, Tag
+from recipes.models import SEARCH_CONFIG, Recipe, Tag
+
+# Наибольшее число рецептов, запрашиваемых параметром ids.
+MAX_IDS = 100
+
+
+class NumberInFilter(BaseInFilter, NumberFilter):
+    """Список чисел через запятую."""
 
 
 class RecipeFilter(FilterSet):
@@ -21,6 +35,8 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = BooleanFilter(
         method='filter_is_in_shopping_cart',
     )
+    search = CharFilter(method='filter_search')
+    ids = NumberInFilter(method='filter_ids')
 
     class Meta:
         model: Recipe = Recipe
@@ -43,3 +59,47 @@ class RecipeFilter(FilterSet):
             return queryset.filter(userscarts__user=self.request.user)
         else:
             return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию, описанию и ингредиентам."""
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch',
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query),
+        )
+
+    def filter_ids(self, queryset, name, value):
+        """Рецепты с перечисленными id в порядке перечисления."""
+        ids = list(dict.fromkeys(int(pk) for pk in value))
+        if len(ids) > MAX_IDS:
+            raise ValidationError(
+                {'ids': [f'Можно запросить не больше {MAX_IDS} рецептов.']},
+            )
+        return queryset.filter(id__in=ids).annotate(
+            ids_order=Case(
+                *[When(id=pk, then=Value(pos)) for pos, pk in enumerate(ids)],
+                output_field=IntegerField(),
+            ),
+        )
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    """Сортировка рецептов; при поиске по умолчанию - по релевантности.
+
+    ordering=trending сортирует по популярности, пересчитываемой командой
+    update_trending, а при запросе по ids рецепты по умолчанию идут
+    в порядке перечисления.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get(self.ordering_param) == 'trending':
+            return ('-trending_score', '-id')
+        return super().get_ordering(request, queryset, view)
+
+    def get_default_ordering(self, view):
+        if view.request.query_params.get('ids'):
+            return ('ids_order',)
+        if view.request.query_params.get('search'):
+            return ('-rank', '-id')
+        return super().get_default_ordering(view)
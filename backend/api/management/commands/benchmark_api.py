@@ -0,0 +1,73 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Нагрузочный замер эндпоинтов API запущенного сервера.
+
+    Позволяет сравнить пропускную способность разных конфигураций
+    (например, WSGI с sync-воркерами и ASGI с uvicorn-воркерами):
+    python manage.py benchmark_api /api/recipes/?limit=6 -c 32 -n 2000
+    """
+
+    help = 'Замер RPS и задержек эндпоинтов API.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument(
+            '--base-url', default='http://localhost:8000',
+        )
+        parser.add_argument(
+            '-c', '--concurrency', type=int, default=16,
+        )
+        parser.add_argument(
+            '-n', '--requests', type=int, default=1000,
+        )
+        parser.add_argument(
+            '--token', help='Токен для авторизованных запросов.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        for path in options['paths']:
+            self.benchmark(
+                options['base_url'] + path,
+                headers,
+                options['concurrency'],
+                options['requests'],
+            )
+
+    def benchmark(self, url, headers, concurrency, total) -> None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=concurrency, pool_maxsize=concurrency,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        def fetch(_):
+            start = time.perf_counter()
+            response = session.get(url, headers=headers)
+            return time.perf_counter() - start, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(fetch, range(total)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, _ in results)
+        errors = sum(1 for _, status in results if status >= 400)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(self.style.SUCCESS(
+            f'{url}: {total / elapsed:.1f} rps, '
+            f'p50 {statistics.median(latencies) * 1000:.1f} ms, '
+            f'p95 {p95 * 1000:.1f} ms, '
+            f'ошибок {errors} из {total} '
+            f'(concurrency={concurrency})'
+        ))
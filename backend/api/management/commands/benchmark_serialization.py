@@ -0,0 +1,89 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api.projections import recipes_to_dicts
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeSerializer
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Замер CPU на сборку одной страницы списка рецептов.
+
+    Сравнивает RecipeSerializer с JSONRenderer и сборку из проекций
+    с ORJSONRenderer и проверяет, что ответы совпадают побайтно:
+    python manage.py benchmark_serialization --limit 6 -n 200 --user 1
+    """
+
+    help = 'Сравнение сериализаторов и проекций для списка рецептов.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument(
+            '-n', '--repeat', type=int, default=100,
+        )
+        parser.add_argument(
+            '--user', type=int, help='id пользователя для флагов рецептов.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        request = RequestFactory().get('/api/recipes/')
+        request.user = (
+            User.objects.get(pk=options['user'])
+            if options['user'] else AnonymousUser()
+        )
+        ids = list(
+            Recipe.objects.values_list('id', flat=True)[:options['limit']],
+        )
+
+        def serializers():
+            recipes = Recipe.objects.filter(id__in=ids).select_related(
+                'author',
+            )
+            data = RecipeSerializer(
+                recipes, many=True, context={'request': request},
+            ).data
+            return JSONRenderer().render(data)
+
+        def projections():
+            return ORJSONRenderer().render(
+                recipes_to_dicts(request, request.user, ids),
+            )
+
+        results = [
+            self.measure(name, func, options['repeat'])
+            for name, func in (
+                ('RecipeSerializer', serializers),
+                ('projections', projections),
+            )
+        ]
+        if results[0] != results[1]:
+            raise CommandError('Ответы сериализаторов и проекций различаются')
+        self.stdout.write(self.style.SUCCESS('Ответы совпадают побайтно'))
+
+    def measure(self, name, func, repeat) -> bytes:
+        queries = []
+
+        def count_queries(execute, sql, *args):
+            queries.append(sql)
+            return execute(sql, *args)
+
+        with connection.execute_wrapper(count_queries):
+            content = func()
+        started = time.process_time()
+        for _ in range(repeat):
+            func()
+        elapsed = (time.process_time() - started) / repeat
+        self.stdout.write(
+            f'{name}: {elapsed * 1000:.2f} ms CPU на страницу, '
+            f'запросов {len(queries)}, {len(content)} байт',
+        )
+        return content
@@ -0,0 +1,157 @@
+import heapq
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min
+
+from api.pantry import PantryIndex
+from recipes.models import Recipe, SimilarRecipe
+
+
+def contains(posting, recipe_id) -> bool:
+    position = bisect_left(posting, recipe_id)
+    return position < len(posting) and posting[position] == recipe_id
+
+
+class Command(BaseCommand):
+    """Расчет похожих рецептов по коэффициенту Жаккара наборов ингредиентов.
+
+    Кандидаты для каждого рецепта берутся из инвертированного индекса
+    ингредиентов, поэтому сравниваются только рецепты с общими
+    ингредиентами. Стоимость растет с длиной списков рецептов у
+    ингредиентов, поэтому ингредиенты, которые есть больше чем в
+    --max-posting рецептах (соль, вода), кандидатов не дают и только
+    учитываются в коэффициенте. По умолчанию пересчитываются рецепты
+    с измененными ингредиентами, рецепты, в списках которых они
+    встречаются, и рецепты, в списки которых они теперь попадают.
+    """
+
+    help = 'Пересчет таблицы похожих рецептов.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать все рецепты.',
+        )
+        parser.add_argument('--top-k', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--max-posting',
+            type=int,
+            default=1000,
+            help='Ингредиенты из большего числа рецептов не дают кандидатов.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        index = PantryIndex()
+        index.build()
+        common = {
+            ingredient_id
+            for ingredient_id, posting in index.postings.items()
+            if len(posting) > options['max_posting']
+        }
+        top_k = options['top_k']
+        batch_size = options['batch_size']
+        if options['all']:
+            recipe_ids = list(index.recipes)
+        else:
+            stale = set(
+                Recipe.objects.filter(similar_stale=True)
+                .values_list('id', flat=True)
+            )
+            reverse = self.reverse_neighbors(
+                index, common, stale, top_k, batch_size,
+            )
+            stale |= set(
+                SimilarRecipe.objects.filter(similar_id__in=stale)
+                .values_list('recipe_id', flat=True)
+            )
+            recipe_ids = sorted(stale | reverse)
+
+        for start in range(0, len(recipe_ids), batch_size):
+            batch = recipe_ids[start:start + batch_size]
+            rows = []
+            for recipe_id in batch:
+                rows.extend(
+                    SimilarRecipe(
+                        recipe_id=recipe_id,
+                        similar_id=similar_id,
+                        score=score,
+                    )
+                    for similar_id, score in heapq.nlargest(
+                        top_k,
+                        self.scores(index, common, recipe_id),
+                        key=lambda item: item[1],
+                    )
+                )
+            with transaction.atomic():
+                SimilarRecipe.objects.filter(recipe_id__in=batch).delete()
+                SimilarRecipe.objects.bulk_create(rows)
+                Recipe.objects.filter(id__in=batch).update(
+                    similar_stale=False,
+                )
+            self.stdout.write(f'Обработано: {start + len(batch)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Похожие рецепты пересчитаны для {len(recipe_ids)} рецептов',
+        ))
+
+    @staticmethod
+    def scores(index, common, recipe_id):
+        """Пары (id рецепта, коэффициент Жаккара) для кандидатов.
+
+        Кандидаты - рецепты с общими ингредиентами не из common,
+        совпадения по ингредиентам из common проверяются поиском
+        в их отсортированных списках.
+        """
+        ingredients = index.recipes.get(recipe_id, ())
+        shared = Counter()
+        for ingredient_id in ingredients:
+            if ingredient_id not in common:
+                shared.update(index.postings[ingredient_id])
+        shared.pop(recipe_id, None)
+        common_postings = [
+            index.postings[ingredient_id]
+            for ingredient_id in ingredients if ingredient_id in common
+        ]
+        for similar_id, count in shared.items():
+            count += sum(
+                contains(posting, similar_id) for posting in common_postings
+            )
+            yield similar_id, count / (
+                len(ingredients) + len(index.recipes[similar_id]) - count
+            )
+
+    def reverse_neighbors(self, index, common, stale, top_k, batch_size):
+        """Рецепты, в списки похожих которых попадают рецепты из stale.
+
+        Рецепт пересчитывается, если коэффициент с измененным рецептом
+        выше последнего в его списке или список неполный.
+        """
+        best = defaultdict(float)
+        for recipe_id in stale:
+            for similar_id, score in self.scores(index, common, recipe_id):
+                best[similar_id] = max(best[similar_id], score)
+        candidates = sorted(set(best) - stale)
+        reverse = set()
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            lists = {
+                row['recipe_id']: row
+                for row in SimilarRecipe.objects.filter(
+                    recipe_id__in=batch,
+                ).values('recipe_id').annotate(
+                    size=Count('id'), lowest=Min('score'),
+                )
+            }
+            for recipe_id in batch:
+                row = lists.get(recipe_id)
+                if (
+                    row is None
+                    or row['size'] < top_k
+                    or best[recipe_id] > row['lowest']
+                ):
+                    reverse.add(recipe_id)
+        return reverse
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.querycheck import NPlusOneError
+from api.urls import router
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Поиск N+1 запросов в GET-эндпоинтах всех viewset из api.urls.
+
+    Для каждого viewset запрашиваются список, первый объект списка и
+    GET-действия в режиме STRICT_QUERIES=raise. Запросы выполняются
+    к текущей базе, поэтому в ней должны быть данные:
+    python manage.py check_queries --user admin@example.com
+    """
+
+    help = 'Проверка эндпоинтов API на N+1 запросы.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--user', help='Email пользователя для авторизованных запросов.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Размер страницы списков.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        self.failed = 0
+        with override_settings(
+            STRICT_QUERIES='raise', ALLOWED_HOSTS=['testserver'],
+        ):
+            client = APIClient()
+            if options['user']:
+                try:
+                    user = User.objects.get(email=options['user'])
+                except User.DoesNotExist:
+                    raise CommandError(
+                        f'Пользователь {options["user"]} не найден.',
+                    )
+                client.force_authenticate(user)
+            root = reverse('api:api-root')
+            for prefix, viewset, _ in router.registry:
+                self.check_viewset(
+                    client, f'{root}{prefix}/', viewset, options['limit'],
+                )
+        if self.failed:
+            raise CommandError(f'N+1 запросы в эндпоинтах: {self.failed}.')
+        self.stdout.write(self.style.SUCCESS('N+1 запросов не найдено.'))
+
+    def check_viewset(self, client, list_url, viewset, limit) -> None:
+        """Список, первый объект списка и GET-действия viewset."""
+        data = self.get(client, f'{list_url}?limit={limit}')
+        if isinstance(data, dict):
+            data = data.get('results')
+        detail_url = None
+        if data and isinstance(data[0], dict) and 'id' in data[0]:
+            detail_url = f'{list_url}{data[0]["id"]}/'
+            self.get(client, detail_url)
+        for extra in viewset.get_extra_actions():
+            base = detail_url if extra.detail else list_url
+            if 'get' in extra.mapping and base is not None:
+                self.get(client, f'{base}{extra.url_path}/?limit={limit}')
+
+    def get(self, client, url):
+        """Данные ответа или None при ошибке и N+1 запросах."""
+        try:
+            response = client.get(url)
+        except NPlusOneError as error:
+            self.failed += 1
+            self.stdout.write(self.style.ERROR(str(error)))
+            return None
+        except Exception as error:
+            self.stdout.write(self.style.WARNING(f'{url}: {error!r}'))
+            return None
+        if response.status_code >= 400:
+            self.stdout.write(self.style.WARNING(
+                f'{url}: статус {response.status_code}',
+            ))
+            return None
+        self.stdout.write(f'{url}: OK')
+        return getattr(response, 'data', None)
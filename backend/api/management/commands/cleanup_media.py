@@ -0,0 +1,53 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.deletion import delete_images, old_images, unused_images
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Удаление изображений, на которые не ссылается ни один рецепт.
+
+    Файлы моложе --min-age часов (MEDIA_CLEANUP_MIN_AGE) пропускаются:
+    они могут принадлежать рецепту, транзакция которого еще не
+    завершена.
+    """
+
+    help = 'Удаление неиспользуемых изображений рецептов.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--min-age', type=float, default=settings.MEDIA_CLEANUP_MIN_AGE,
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести число неиспользуемых файлов.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        field = Recipe._meta.get_field('image')
+        storage = field.storage
+        directory = field.upload_to.rstrip('/')
+        if not storage.exists(directory):
+            return
+        names = [
+            os.path.join(directory, filename)
+            for filename in storage.listdir(directory)[1]
+        ]
+        removed = 0
+        for start in range(0, len(names), options['batch_size']):
+            unused = old_images(
+                unused_images(names[start:start + options['batch_size']]),
+                options['min_age'],
+            )
+            if not options['dry_run']:
+                delete_images(unused)
+            removed += len(unused)
+        self.stdout.write(self.style.SUCCESS(
+            f'Неиспользуемых изображений: {removed}'
+            + (' (не удалены)' if options['dry_run'] else ''),
+        ))
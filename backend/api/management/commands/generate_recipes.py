@@ -0,0 +1,148 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+    UsersCart,
+)
+from users.models import UserSubscription
+
+User = get_user_model()
+
+WORDS = (
+    'суп', 'салат', 'пирог', 'каша', 'омлет', 'рагу', 'паста', 'котлеты',
+    'запеканка', 'блины', 'борщ', 'плов', 'курица', 'рыба', 'овощи',
+    'грибы', 'сыр', 'томаты', 'картофель', 'яблоки', 'ягоды', 'шоколад',
+)
+
+
+class Command(BaseCommand):
+    """Генерация синтетического набора данных для замеров производительности.
+
+    Ингредиенты берутся из базы (см. load_ingredients), пользователи,
+    рецепты, подписки, избранное и списки покупок создаются пачками.
+    """
+
+    help = 'Создание синтетических рецептов для бенчмарков.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options) -> None:
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredient_ids:
+            self.stderr.write(self.style.ERROR(
+                'Нет ингредиентов: выполните load_ingredients.',
+            ))
+            return
+        tag_ids = self.ensure_tags()
+
+        with transaction.atomic():
+            prefix = f'bench{User.objects.count()}'
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=f'{prefix}_{i}',
+                        email=f'{prefix}_{i}@example.com',
+                        first_name='Бенчмарк',
+                        last_name=str(i),
+                        password='!',
+                    )
+                    for i in range(options['users'])
+                ],
+                batch_size=batch_size,
+            )
+            user_ids = list(
+                User.objects.filter(username__startswith=f'{prefix}_')
+                .values_list('id', flat=True)
+            )
+            self.stdout.write(f'Пользователей: {len(user_ids)}')
+
+            UserSubscription.objects.bulk_create(
+                [
+                    UserSubscription(user_id=user_id, author_id=author_id)
+                    for user_id in user_ids
+                    for author_id in rng.sample(
+                        user_ids, min(10, len(user_ids)),
+                    )
+                    if author_id != user_id
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+
+        created = 0
+        while created < options['recipes']:
+            size = min(batch_size, options['recipes'] - created)
+            with transaction.atomic():
+                self.create_batch(
+                    rng, size, user_ids, ingredient_ids, tag_ids, options,
+                )
+            created += size
+            self.stdout.write(f'Рецептов: {created}')
+        self.stdout.write(self.style.SUCCESS('Генерация завершена'))
+
+    def ensure_tags(self) -> list:
+        for slug, name, color in (
+            ('breakfast', 'Завтрак', '#E26C2D'),
+            ('lunch', 'Обед', '#49B64E'),
+            ('dinner', 'Ужин', '#8775D2'),
+        ):
+            if not Tag.objects.filter(slug=slug).exists():
+                Tag.objects.create(slug=slug, name=name, color=color)
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_batch(
+        self, rng, size, user_ids, ingredient_ids, tag_ids, options,
+    ) -> None:
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                author_id=rng.choice(user_ids),
+                name=' '.join(rng.sample(WORDS, 3)).capitalize(),
+                text=' '.join(rng.choices(WORDS, k=40)),
+                cooking_time=rng.randint(1, 180),
+                image='images_for_recipes/benchmark.png',
+            )
+            for _ in range(size)
+        ])
+        TagThrough = Recipe.tags.through
+        TagThrough.objects.bulk_create([
+            TagThrough(recipe_id=recipe.id, tag_id=tag_id)
+            for recipe in recipes
+            for tag_id in rng.sample(tag_ids, rng.randint(1, len(tag_ids)))
+        ])
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe_id=recipe.id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 50),
+            )
+            for recipe in recipes
+            for ingredient_id in rng.sample(
+                ingredient_ids,
+                min(options['ingredients_per_recipe'], len(ingredient_ids)),
+            )
+        ])
+        Recipe.update_search_vector([recipe.id for recipe in recipes])
+        for model in (Favorite, UsersCart):
+            model.objects.bulk_create(
+                [
+                    model(user_id=rng.choice(user_ids), recipe_id=recipe.id)
+                    for recipe in recipes
+                    for _ in range(rng.randint(0, 3))
+                ],
+                ignore_conflicts=True,
+            )
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipes.deletion import (
+    delete_unused_images,
+    purge_recipes,
+    purge_sync_log,
+    purge_users,
+)
+
+
+class Command(BaseCommand):
+    """Очистка пользователей и рецептов, помеченных удаленными.
+
+    Связанные строки удаляются пачками по --batch-size, затем удаляются
+    изображения, на которые больше не ссылаются рецепты, и устаревшие
+    записи синхронизации. Изображения моложе MEDIA_CLEANUP_MIN_AGE
+    часов остаются для cleanup_media. С --interval команда работает как фоновый
+    обработчик.
+    """
+
+    help = 'Удаление помеченных удаленными пользователей и рецептов.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Проверять наличие удаленных объектов каждые N секунд.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options) -> None:
+        while True:
+            self.process(options['batch_size'])
+            if not options['interval']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def process(self, batch_size) -> None:
+        recipes = images = 0
+        while True:
+            names = purge_recipes(batch_size)
+            if names is None:
+                break
+            recipes += 1
+            images += len(delete_unused_images(names))
+        users = purge_users(batch_size)
+        purge_sync_log()
+        if recipes or users:
+            self.stdout.write(self.style.SUCCESS(
+                f'Удалено пачек рецептов: {recipes}, изображений: {images}, '
+                f'пользователей: {users}',
+            ))
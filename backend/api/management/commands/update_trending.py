@@ -0,0 +1,74 @@
+import math
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, UsersCart
+
+# Вес добавления рецепта в избранное и в список покупок.
+WEIGHTS = ((Favorite, 1.0), (UsersCart, 0.5))
+
+
+class Command(BaseCommand):
+    """Пересчет популярности рецептов для сортировки ordering=trending.
+
+    Каждое добавление в избранное или список покупок за последние
+    TRENDING_WINDOW дней дает вклад, экспоненциально убывающий с периодом
+    полураспада TRENDING_HALF_LIFE часов. С --interval команда работает
+    как планировщик и повторяет пересчет с заданным периодом.
+    """
+
+    help = 'Пересчет популярности рецептов.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Повторять пересчет каждые N секунд.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options) -> None:
+        while True:
+            started = time.monotonic()
+            updated = self.update(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Популярность обновлена для {updated} рецептов '
+                f'за {time.monotonic() - started:.1f} с',
+            ))
+            if not options['interval']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def update(self, batch_size) -> int:
+        now = timezone.now()
+        decay = math.log(2) / (settings.TRENDING_HALF_LIFE * 3600)
+        scores = defaultdict(float)
+        for model, weight in WEIGHTS:
+            rows = model.objects.filter(
+                created__gte=now - timedelta(days=settings.TRENDING_WINDOW),
+            ).values_list('recipe_id', 'created')
+            for recipe_id, created in rows.iterator(chunk_size=10000):
+                age = (now - created).total_seconds()
+                scores[recipe_id] += weight * math.exp(-decay * age)
+
+        # Рецепты, вышедшие из окна, обнуляются.
+        for recipe_id in Recipe.objects.filter(
+            trending_score__gt=0,
+        ).values_list('id', flat=True).iterator():
+            scores.setdefault(recipe_id, 0)
+
+        recipes = [
+            Recipe(id=recipe_id, trending_score=score)
+            for recipe_id, score in scores.items()
+        ]
+        Recipe.objects.bulk_update(
+            recipes, ['trending_score'], batch_size=batch_size,
+        )
+        return len(recipes)
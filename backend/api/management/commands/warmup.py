@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.warmup import STEPS, warm
+
+# Импорт приложения так же, как при запуске gunicorn.
+STARTUP_CODE = 'import backend.wsgi, backend.urls'
+
+
+class Command(BaseCommand):
+    """Замер холодного старта: импорты и шаги прогрева.
+
+    Шаги выполняются дважды, чтобы сравнить первый вызов с повторным.
+    С --imports приложение импортируется в отдельном процессе
+    с python -X importtime, и время импорта группируется по пакетам:
+    python manage.py warmup --imports --top 15
+    """
+
+    help = 'Прогрев кэшей и замер времени запуска.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            'steps',
+            nargs='*',
+            help=f'Шаги прогрева из {", ".join(STEPS)}, по умолчанию все.',
+        )
+        parser.add_argument(
+            '--imports',
+            action='store_true',
+            help='Разбивка времени импорта по пакетам и модулям.',
+        )
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options) -> None:
+        unknown = set(options['steps']) - set(STEPS)
+        if unknown:
+            raise CommandError(f'Неизвестные шаги: {", ".join(unknown)}')
+        if options['imports']:
+            self.report_imports(options['top'])
+        cold = warm(options['steps'])
+        hot = warm(options['steps'])
+        for name, elapsed in cold.items():
+            self.stdout.write(
+                f'{name}: {elapsed * 1000:.1f} ms, '
+                f'повторно {hot[name] * 1000:.1f} ms',
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрев: {sum(cold.values()) * 1000:.1f} ms',
+        ))
+
+    def report_imports(self, top) -> None:
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+            capture_output=True,
+            text=True,
+            env=os.environ,
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        modules = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            self_us, _, name = line[len('import time:'):].split('|')
+            if not self_us.strip().isdigit():
+                continue
+            modules[name.strip()] = int(self_us)
+        packages = defaultdict(int)
+        for name, self_us in modules.items():
+            packages[name.split('.')[0]] += self_us
+
+        self.stdout.write(
+            f'Запуск процесса с импортом приложения: {elapsed * 1000:.0f} ms, '
+            f'импорт модулей: {sum(modules.values()) / 1000:.0f} ms',
+        )
+        for title, times in (('Пакеты', packages), ('Модули', modules)):
+            self.stdout.write(f'{title}:')
+            for name, self_us in sorted(
+                times.items(), key=lambda item: item[1], reverse=True,
+            )[:top]:
+                self.stdout.write(f'  {self_us / 1000:8.1f} ms  {name}')
@@ -0,0 +1,36 @@
+"""Счетчики производительности текущего процесса (воркера)."""
+import os
+import threading
+from collections import Counter
+
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def incr(name: str, value: int = 1) -> None:
+    """Увеличение счетчика."""
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot() -> dict:
+    """Текущие значения счетчиков и производные показатели."""
+    with _lock:
+        counters = dict(_counters)
+    requests = counters.get('requests', 0)
+    created = counters.get('db_connections_created', 0)
+    counters['db_connection_reuse_ratio'] = (
+        round(1 - min(created, requests) / requests, 4) if requests else None
+    )
+    checkouts = counters.get('db_pool_checkouts', 0)
+    if checkouts:
+        counters['db_pool_reuse_ratio'] = round(
+            1 - counters.get('db_pool_connections_opened', 0) / checkouts, 4,
+        )
+    compressed = counters.get('compression_bytes_in', 0)
+    if compressed:
+        counters['compression_ratio'] = round(
+            counters.get('compression_bytes_out', 0) / compressed, 4,
+        )
+    counters['pid'] = os.getpid()
+    return counters
@@ -0,0 +1,262 @@
+import cProfile
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+
+from api import metrics, profiling, querycheck
+from api.authentication import CachedTokenAuthentication
+from backend import routers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class ReplicaRoutingMiddleware:
+    """Направление безопасных запросов к API на реплики БД.
+
+    Реплики используются только представлениями, разрешившими это через
+    ``replica_read_actions`` (viewset) или ``replica_reads`` (функция).
+    После изменяющего запроса клиент на DB_REPLICA_STICKY_SECONDS
+    закрепляется за основной базой, чтобы видеть свои изменения.
+    Запрос входа не содержит учетных данных, поэтому закрепляется
+    выданный в ответе токен.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        token = getattr(request, '_replica_token', None)
+        if token is not None:
+            routers.use_replica.reset(token)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            keys = [self.pin_key(request)]
+            data = getattr(response, 'data', None)
+            if isinstance(data, dict) and data.get('auth_token'):
+                keys.append(self.get_pin_key(f'Token {data["auth_token"]}'))
+            cache.set_many(
+                dict.fromkeys(filter(None, keys), True),
+                settings.DB_REPLICA_STICKY_SECONDS,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and self.allows_replica(request, view_func)
+        ):
+            key = self.pin_key(request)
+            if not (key and cache.get(key)):
+                request._replica_token = routers.use_replica.set(True)
+
+    @staticmethod
+    def allows_replica(request, view_func) -> bool:
+        if getattr(view_func, 'replica_reads', False):
+            return True
+        viewset = getattr(view_func, 'cls', None)
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower())
+        return action in getattr(viewset, 'replica_read_actions', ())
+
+    @classmethod
+    def pin_key(cls, request):
+        credentials = request.META.get('HTTP_AUTHORIZATION') or (
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        if not credentials:
+            return None
+        return cls.get_pin_key(credentials)
+
+    @staticmethod
+    def get_pin_key(credentials) -> str:
+        digest = hashlib.sha1(credentials.encode()).hexdigest()
+        return f'replica_pin:{digest}'
+
+
+class CompressionMiddleware:
+    """Сжатие ответов API в brotli или gzip согласно Accept-Encoding.
+
+    Сжимаются ответы не меньше COMPRESSION_MIN_SIZE байт. Сжатые тела
+    хранятся в LRU-кэше по хэшу содержимого, поэтому одинаковые ответы
+    (повторные запросы неизменившихся страниц) повторно не сжимаются.
+    Объем до и после сжатия, затраченное и сэкономленное кэшем время CPU
+    учитываются в метриках.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.lock = threading.Lock()
+        self.compressed = OrderedDict()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not request.path.startswith('/api/')
+            or response.streaming
+            or response.status_code != 200
+            or response.has_header('Content-Encoding')
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.negotiate(request)
+        if encoding is None:
+            return response
+
+        content = response.content
+        body = self.compress(content, encoding)
+        if len(body) >= len(content):
+            return response
+        metrics.incr('compression_responses')
+        metrics.incr('compression_bytes_in', len(content))
+        metrics.incr('compression_bytes_out', len(body))
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    @staticmethod
+    def negotiate(request):
+        """Лучшее поддерживаемое клиентом сжатие."""
+        accepted = set()
+        for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+            coding, _, params = item.lower().partition(';')
+            name, _, value = params.partition('=')
+            try:
+                quality = float(value) if name.strip() == 'q' else 1
+            except ValueError:
+                quality = 0
+            if quality > 0:
+                accepted.add(coding.strip())
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def compress(self, content, encoding) -> bytes:
+        key = (encoding, hashlib.sha1(content).digest())
+        with self.lock:
+            cached = self.compressed.get(key)
+            if cached is not None:
+                self.compressed.move_to_end(key)
+        if cached is not None:
+            body, elapsed = cached
+            metrics.incr('compression_cache_hits')
+            metrics.incr('compression_cpu_saved_us', elapsed)
+            return body
+
+        started = time.process_time()
+        if encoding == 'br':
+            body = brotli.compress(
+                content, quality=settings.COMPRESSION_BROTLI_QUALITY,
+            )
+        else:
+            body = compress_string(content)
+        elapsed = int((time.process_time() - started) * 1_000_000)
+        metrics.incr('compression_cpu_us', elapsed)
+        with self.lock:
+            self.compressed[key] = (body, elapsed)
+            while len(self.compressed) > settings.COMPRESSION_CACHE_SIZE:
+                self.compressed.popitem(last=False)
+        return body
+
+
+class ProfilingMiddleware:
+    """Профилирование запросов к API через cProfile.
+
+    Профилируются запросы сотрудников с заголовком PROFILING_HEADER и
+    случайная доля PROFILING_SAMPLE_RATE остальных запросов. Имя
+    сохраненного профиля возвращается в заголовке X-Profile-Id. Без
+    PROFILING_ENABLED middleware отключается при запуске и не влияет
+    на обработку запросов.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # В процессе одновременно работает один профилировщик.
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        if not (
+            request.path.startswith('/api/')
+            and self.should_profile(request)
+            and self.lock.acquire(blocking=False)
+        ):
+            return self.get_response(request)
+        try:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            name = profiling.save(
+                profiler, request, time.perf_counter() - started,
+            )
+        finally:
+            self.lock.release()
+        metrics.incr('profiles_saved')
+        response['X-Profile-Id'] = name
+        return response
+
+    @staticmethod
+    def should_profile(request) -> bool:
+        if request.headers.get(settings.PROFILING_HEADER):
+            return ProfilingMiddleware.is_staff(request)
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    @staticmethod
+    def is_staff(request) -> bool:
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            return True
+        try:
+            result = CachedTokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return result is not None and result[0].is_staff
+
+
+class StrictQueriesMiddleware:
+    """Поиск N+1 запросов при выводе сериализаторов API (api.querycheck).
+
+    Включается настройкой STRICT_QUERIES: raise - исключение с полем
+    сериализатора и стеком, log - предупреждение в лог.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STRICT_QUERIES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+        with querycheck.inspect_queries() as inspector:
+            response = self.get_response(request)
+        violations = inspector.violations()
+        if violations:
+            querycheck.report(request, violations)
+        return response
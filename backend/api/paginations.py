@@ -1,7 +1,106 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class PageAndLimitPagination(PageNumberPagination):
 
     page_query_param = 'page'
     page_size_query_param = 'limit'
+
+
+class PantryPagination(PageAndLimitPagination):
+    """Постраничный вывод и без limit: совпадений может быть тысячи."""
+
+    page_size = 20
+    max_page_size = 100
+
+
+class KeysetPagination:
+    """Постраничный вывод по ключу (date_field, id) последнего элемента.
+
+    Следующая страница выбирается условием по индексу, а не смещением,
+    поэтому стоимость запроса не растет с номером страницы.
+    """
+
+    date_field = 'pub_date'
+    descending = True
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    page_size = 10
+    max_page_size = 100
+
+    def __init__(self, request):
+        self.request = request
+        try:
+            self.limit = max(1, min(
+                int(request.query_params.get(
+                    self.page_size_query_param, self.page_size,
+                )),
+                self.max_page_size,
+            ))
+        except ValueError:
+            self.limit = self.page_size
+        self.cursor = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param),
+        )
+
+    @staticmethod
+    def decode_cursor(value):
+        if not value:
+            return None
+        try:
+            pub_date, pk = base64.urlsafe_b64decode(
+                value.encode(),
+            ).decode().split('|')
+            return datetime.fromisoformat(pub_date), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError({'cursor': 'Некорректный курсор.'})
+
+    @staticmethod
+    def encode_cursor(pub_date, pk) -> str:
+        return base64.urlsafe_b64encode(
+            f'{pub_date.isoformat()}|{pk}'.encode(),
+        ).decode()
+
+    def get_keys(self, queryset, pk_field='id') -> list:
+        """Ключи (дата, pk) следующей страницы плюс один лишний для
+        определения наличия продолжения.
+        """
+        lookup = 'lt' if self.descending else 'gt'
+        if self.cursor:
+            date, pk = self.cursor
+            queryset = queryset.filter(
+                Q(**{f'{self.date_field}__{lookup}': date})
+                | Q(**{self.date_field: date, f'{pk_field}__{lookup}': pk}),
+            )
+        prefix = '-' if self.descending else ''
+        return list(
+            queryset.order_by(
+                f'{prefix}{self.date_field}', f'{prefix}{pk_field}',
+            ).values_list(self.date_field, pk_field)[:self.limit + 1],
+        )
+
+    def get_paginated_response(self, data, last_key) -> Response:
+        next_url = None
+        if last_key is not None:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(),
+                self.cursor_query_param,
+                self.encode_cursor(*last_key),
+            )
+        return Response({'next': next_url, 'results': data})
+
+
+class ChangesPagination(KeysetPagination):
+    """Изменения рецептов по возрастанию (updated_at, id)."""
+
+    date_field = 'updated_at'
+    descending = False
+    page_size = 100
+    max_page_size = 500
@@ -0,0 +1,113 @@
+"""Инвертированный индекс ингредиентов для поиска рецептов по продуктам."""
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from recipes.models import RecipeIngredient
+
+
+class PantryIndex:
+    """Индекс ингредиент -> отсортированный массив id рецептов.
+
+    Строится целиком при первом обращении и раз в PANTRY_INDEX_TTL секунд
+    (изменения в других воркерах), а изменения рецептов в текущем воркере
+    применяются сразу через refresh_recipes. Индекс строит один поток,
+    остальные ждут только первого построения, а при обновлении
+    используют прежний индекс.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.build_lock = threading.Lock()
+        self.postings = {}
+        self.recipes = {}
+        self.built_at = None
+
+    def build(self) -> None:
+        postings = defaultdict(lambda: array('q'))
+        recipes = defaultdict(list)
+        rows = RecipeIngredient.objects.filter(
+            recipe__is_deleted=False,
+        ).order_by('recipe_id').values_list('recipe_id', 'ingredient_id')
+        for recipe_id, ingredient_id in rows.iterator(chunk_size=10000):
+            postings[ingredient_id].append(recipe_id)
+            recipes[recipe_id].append(ingredient_id)
+        with self.lock:
+            self.postings = dict(postings)
+            self.recipes = {
+                recipe_id: tuple(ingredient_ids)
+                for recipe_id, ingredient_ids in recipes.items()
+            }
+            self.built_at = time.monotonic()
+
+    def is_stale(self) -> bool:
+        return (
+            self.built_at is None
+            or time.monotonic() - self.built_at > settings.PANTRY_INDEX_TTL
+        )
+
+    def ensure_fresh(self) -> None:
+        if not self.is_stale():
+            return
+        if not self.build_lock.acquire(blocking=self.built_at is None):
+            return
+        try:
+            if self.is_stale():
+                self.build()
+        finally:
+            self.build_lock.release()
+
+    def remove_recipe(self, recipe_id) -> None:
+        with self.lock:
+            for ingredient_id in self.recipes.pop(recipe_id, ()):
+                posting = self.postings[ingredient_id]
+                position = bisect_left(posting, recipe_id)
+                if position < len(posting) and posting[position] == recipe_id:
+                    del posting[position]
+
+    def refresh_recipes(self, recipe_ids) -> None:
+        """Перечитывание ингредиентов изменившихся или удаленных рецептов."""
+        if self.built_at is None:
+            return
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids, recipe__is_deleted=False,
+        ).values_list('recipe_id', 'ingredient_id'):
+            ingredients[recipe_id].append(ingredient_id)
+        with self.lock:
+            for recipe_id in recipe_ids:
+                self.remove_recipe(recipe_id)
+                if not ingredients[recipe_id]:
+                    continue
+                self.recipes[recipe_id] = tuple(ingredients[recipe_id])
+                for ingredient_id in ingredients[recipe_id]:
+                    insort(
+                        self.postings.setdefault(ingredient_id, array('q')),
+                        recipe_id,
+                    )
+
+    def search(self, ingredient_ids, min_coverage) -> list:
+        """Рецепты, ингредиенты которых покрыты набором хотя бы на
+        min_coverage, по убыванию покрытия.
+
+        Возвращает список пар (id рецепта, доля покрытия).
+        """
+        self.ensure_fresh()
+        matched = Counter()
+        with self.lock:
+            for ingredient_id in set(ingredient_ids):
+                matched.update(self.postings.get(ingredient_id, ()))
+            results = []
+            for recipe_id, count in matched.items():
+                coverage = count / len(self.recipes[recipe_id])
+                if coverage >= min_coverage:
+                    results.append((recipe_id, coverage, count))
+        results.sort(key=lambda item: (-item[1], -item[2], -item[0]))
+        return [(recipe_id, coverage) for recipe_id, coverage, _ in results]
+
+
+pantry_index = PantryIndex()
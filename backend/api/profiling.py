@@ -0,0 +1,80 @@
+"""Хранение профилей запросов, снятых ProfilingMiddleware.
+
+Профили сохраняются в PROFILING_DIR в формате pstats (.prof) и
+открываются python -m pstats, snakeviz или pyprof2calltree. Хранится
+не больше PROFILING_MAX_FILES последних профилей.
+"""
+import io
+import os
+import pstats
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+NAME_RE = re.compile(r'^[\w.-]+\.prof$')
+
+
+def get_dir() -> str:
+    return str(settings.PROFILING_DIR)
+
+
+def save(profiler, request, elapsed) -> str:
+    """Сохранение профиля, возвращает имя файла."""
+    slug = re.sub(r'\W+', '_', request.path).strip('_')[:80]
+    name = '{}-{}-{}-{}ms-{}.prof'.format(
+        time.strftime('%Y%m%d%H%M%S'),
+        request.method,
+        slug,
+        round(elapsed * 1000),
+        uuid.uuid4().hex[:6],
+    )
+    os.makedirs(get_dir(), exist_ok=True)
+    profiler.dump_stats(os.path.join(get_dir(), name))
+    for old in list_profiles()[settings.PROFILING_MAX_FILES:]:
+        try:
+            os.remove(os.path.join(get_dir(), old['name']))
+        except FileNotFoundError:
+            pass
+    return name
+
+
+def list_profiles() -> list:
+    """Профили от новых к старым."""
+    try:
+        entries = [
+            entry for entry in os.scandir(get_dir())
+            if entry.is_file() and NAME_RE.match(entry.name)
+        ]
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for entry in entries:
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        profiles.append({
+            'name': entry.name,
+            'size': stat.st_size,
+            'created': datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+        })
+    return sorted(profiles, key=lambda item: item['created'], reverse=True)
+
+
+def get_path(name):
+    """Путь к профилю или None, если имени нет среди профилей."""
+    if not NAME_RE.match(name):
+        return None
+    path = os.path.join(get_dir(), name)
+    return path if os.path.isfile(path) else None
+
+
+def to_text(path, limit=50) -> str:
+    """Функции с наибольшим суммарным временем в текстовом виде."""
+    stream = io.StringIO()
+    stats = pstats.Stats(path, stream=stream)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,189 @@
+"""Сборка рецептов для списков из .values()-проекций.
+
+Ответ совпадает с RecipeSerializer, но собирается из строк выборок без
+сериализаторов DRF: для страницы рецептов выполняется фиксированное
+число запросов, а основное время уходит только на построение словарей.
+Поля, не запрошенные параметром fields, не выбираются из базы.
+"""
+from collections import defaultdict
+
+from api.fieldsets import expanded_fields, requested_fields
+from recipes.models import (
+    Favorite,
+    Recipe,
+    RecipeIngredient,
+    UsersCart,
+)
+from users.models import UserSubscription
+
+# Поля ответа в порядке RecipeSerializer и вложенные объекты среди них.
+RECIPE_FIELDS = (
+    'id',
+    'tags',
+    'author',
+    'ingredients',
+    'is_favorited',
+    'is_in_shopping_cart',
+    'name',
+    'image',
+    'text',
+    'cooking_time',
+)
+NESTED_FIELDS = ('tags', 'author', 'ingredients')
+
+AUTHOR_COLUMNS = {
+    'id': 'author_id',
+    'email': 'author__email',
+    'username': 'author__username',
+    'first_name': 'author__first_name',
+    'last_name': 'author__last_name',
+}
+TAG_KEYS = ('id', 'name', 'color', 'slug')
+INGREDIENT_KEYS = ('id', 'name', 'measurement_unit', 'amount')
+
+image_storage = Recipe._meta.get_field('image').storage
+
+
+def recipe_querysets(user, ids, fields, expand) -> dict:
+    """Запросы, из результатов которых собираются рецепты с id из ids.
+
+    Запросы к связанным таблицам выполняются только для полей из fields.
+    """
+    columns = ['id', 'author_id'] + [
+        name for name in ('name', 'image', 'text', 'cooking_time')
+        if name in fields
+    ]
+    if 'author' in expand:
+        columns += AUTHOR_COLUMNS.values()
+    querysets = {
+        'recipes': Recipe.objects.filter(id__in=ids).order_by().values(
+            *columns,
+        ),
+    }
+    if 'tags' in fields:
+        querysets['tags'] = Recipe.tags.through.objects.filter(
+            recipe_id__in=ids,
+        ).order_by('-tag_id').values_list(
+            'recipe_id',
+            *(
+                ('tag_id', 'tag__name', 'tag__color', 'tag__slug')
+                if 'tags' in expand else ('tag_id',)
+            ),
+        )
+    if 'ingredients' in fields:
+        querysets['ingredients'] = RecipeIngredient.objects.filter(
+            recipe_id__in=ids,
+        ).values_list(
+            'recipe_id',
+            'ingredient_id',
+            *(
+                ('ingredient__name', 'ingredient__measurement_unit')
+                if 'ingredients' in expand else ()
+            ),
+            'amount',
+        )
+    if user.is_authenticated:
+        if 'is_favorited' in fields:
+            querysets['favorited'] = Favorite.objects.filter(
+                user=user, recipe_id__in=ids,
+            ).values_list('recipe_id', flat=True)
+        if 'is_in_shopping_cart' in fields:
+            querysets['in_cart'] = UsersCart.objects.filter(
+                user=user, recipe_id__in=ids,
+            ).values_list('recipe_id', flat=True)
+        if 'author' in expand:
+            querysets['subscribed'] = UserSubscription.objects.filter(
+                user=user,
+                author_id__in=Recipe.objects.filter(id__in=ids).values(
+                    'author_id',
+                ),
+            ).values_list('author_id', flat=True)
+    return querysets
+
+
+def build_recipes(request, ids, rows, fields, expand) -> list:
+    """Словари рецептов в порядке ids; отсутствующие id пропускаются."""
+    tags = defaultdict(list)
+    for recipe_id, *tag in rows.get('tags', ()):
+        tags[recipe_id].append(
+            dict(zip(TAG_KEYS, tag)) if 'tags' in expand else tag[0],
+        )
+    ingredients = defaultdict(list)
+    ingredient_keys = (
+        INGREDIENT_KEYS if 'ingredients' in expand else ('id', 'amount')
+    )
+    for recipe_id, *ingredient in rows.get('ingredients', ()):
+        ingredients[recipe_id].append(dict(zip(ingredient_keys, ingredient)))
+    favorited = set(rows.get('favorited', ()))
+    in_cart = set(rows.get('in_cart', ()))
+    subscribed = set(rows.get('subscribed', ()))
+
+    recipes = {}
+    for row in rows['recipes']:
+        recipe_id = row['id']
+        values = {
+            'id': recipe_id,
+            'tags': tags[recipe_id],
+            'author': row['author_id'],
+            'ingredients': ingredients[recipe_id],
+            'is_favorited': recipe_id in favorited,
+            'is_in_shopping_cart': recipe_id in in_cart,
+            'name': row.get('name'),
+            'image': (
+                request.build_absolute_uri(image_storage.url(row['image']))
+                if row.get('image') else None
+            ),
+            'text': row.get('text'),
+            'cooking_time': row.get('cooking_time'),
+        }
+        if 'author' in expand:
+            values['author'] = {
+                key: row[column] for key, column in AUTHOR_COLUMNS.items()
+            }
+            values['author']['is_subscribed'] = (
+                row['author_id'] in subscribed
+            )
+        recipes[recipe_id] = {name: values[name] for name in fields}
+    return [recipes[pk] for pk in ids if pk in recipes]
+
+
+def get_fieldset(request) -> tuple:
+    """Запрошенные поля рецептов и вложенные объекты, выводимые целиком."""
+    fields = requested_fields(request, RECIPE_FIELDS)
+    expand = expanded_fields(
+        request, [name for name in NESTED_FIELDS if name in fields],
+    )
+    return fields, expand
+
+
+def recipes_to_dicts(request, user, ids) -> list:
+    """Рецепты с id из ids в формате RecipeSerializer.
+
+    Учитываются параметры fields и expand запроса.
+    """
+    ids = list(ids)
+    if not ids:
+        return []
+    fields, expand = get_fieldset(request)
+    rows = {
+        name: list(queryset)
+        for name, queryset in recipe_querysets(
+            user, ids, fields, expand,
+        ).items()
+    }
+    return build_recipes(request, ids, rows, fields, expand)
+
+
+async def arecipes_to_dicts(request, user, ids) -> list:
+    """Асинхронный вариант recipes_to_dicts."""
+    ids = list(ids)
+    if not ids:
+        return []
+    fields, expand = get_fieldset(request)
+    rows = {
+        name: [row async for row in queryset]
+        for name, queryset in recipe_querysets(
+            user, ids, fields, expand,
+        ).items()
+    }
+    return build_recipes(request, ids, rows, fields, expand)
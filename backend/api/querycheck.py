@@ -0,0 +1,171 @@
+"""Строгая проверка запросов к базе при выводе сериализаторов.
+
+Во время запроса к API все SQL-запросы проходят через execute_wrapper
+соединений. Запросы, выполненные при выводе поля сериализатора,
+группируются по отпечатку - тексту запроса без значений параметров.
+Нарушениями считаются:
+- отпечаток, повторенный больше STRICT_QUERIES_MAX_REPEATS раз,
+  например проверка .exists() для каждого объекта списка;
+- ленивая загрузка связанных объектов (obj.author, obj.recipes.count())
+  при выводе элемента списка, даже однократная.
+
+Режим задает STRICT_QUERIES: raise - исключение NPlusOneError
+(разработка и тесты), log - предупреждение в лог (staging).
+"""
+import logging
+import re
+import sys
+import traceback
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+from rest_framework import serializers
+
+from api import metrics
+
+logger = logging.getLogger(__name__)
+
+MODES = ('', 'log', 'raise')
+PLACEHOLDERS_RE = re.compile(r'%s(?:, %s)+')
+LITERALS_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+# Сколько строк стека проекта выводится для нарушения.
+STACK_LIMIT = 8
+
+
+class NPlusOneError(AssertionError):
+    """Повторяющиеся запросы при выводе сериализатора."""
+
+
+def get_fingerprint(sql) -> str:
+    """Текст запроса без значений и с одним параметром в списках IN."""
+    return LITERALS_RE.sub('?', PLACEHOLDERS_RE.sub('%s, ...', sql))
+
+
+def is_related_queryset(value) -> bool:
+    """Выборка менеджера или дескриптора связи конкретного объекта."""
+    return issubclass(type(value), QuerySet) and 'instance' in value._hints
+
+
+def get_context(frame):
+    """Поле сериализатора, вывод элемента списка и ленивая загрузка.
+
+    Стек просматривается от места выполнения запроса наружу.
+    Выполняемое поле - ближайший вызов Serializer.to_representation,
+    список - ListSerializer снаружи этого поля. Запросы prefetch_related
+    ленивой загрузкой не считаются. Локальные переменные проверяются
+    через type(), чтобы не вычислять ленивые объекты вроде request.user.
+    """
+    field = None
+    in_list = related = prefetch = False
+    while frame is not None:
+        name = frame.f_code.co_name
+        owner = frame.f_locals.get('self')
+        owner_class = type(owner)
+        if name == 'prefetch_one_level':
+            prefetch = True
+        elif is_related_queryset(owner):
+            related = True
+        elif name == 'to_representation':
+            if field is None and issubclass(
+                owner_class, serializers.Serializer,
+            ):
+                current = frame.f_locals.get('field')
+                if current is not None:
+                    field = f'{owner_class.__name__}.{current.field_name}'
+            elif field is not None and issubclass(
+                owner_class, serializers.ListSerializer,
+            ):
+                in_list = True
+                break
+        frame = frame.f_back
+    return field, in_list, related and not prefetch
+
+
+def get_stack(frame) -> list:
+    """Вызовы из кода проекта, приведшие к запросу."""
+    stack = traceback.extract_stack(frame)
+    base_dir = str(settings.BASE_DIR)
+    own = [
+        entry for entry in stack
+        if entry.filename.startswith(base_dir)
+        and 'site-packages' not in entry.filename
+        and entry.filename != __file__
+    ]
+    return (own or stack)[-STACK_LIMIT:]
+
+
+class QueryInspector:
+    """execute_wrapper, собирающий запросы полей сериализаторов."""
+
+    def __init__(self, max_repeats=None):
+        if max_repeats is None:
+            max_repeats = settings.STRICT_QUERIES_MAX_REPEATS
+        self.max_repeats = max_repeats
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many:
+            self.record(sql, sys._getframe(1))
+        return execute(sql, params, many, context)
+
+    def record(self, sql, frame) -> None:
+        field, in_list, lazy = get_context(frame)
+        if field is None:
+            return
+        fingerprint = get_fingerprint(sql)
+        query = self.queries.get(fingerprint)
+        if query is None:
+            self.queries[fingerprint] = {
+                'field': field,
+                'count': 1,
+                'lazy': lazy and in_list,
+                'stack': get_stack(frame),
+            }
+        else:
+            query['count'] += 1
+
+    def violations(self) -> list:
+        return [
+            {'sql': fingerprint, **query}
+            for fingerprint, query in self.queries.items()
+            if query['lazy'] or query['count'] > self.max_repeats
+        ]
+
+
+@contextmanager
+def inspect_queries(max_repeats=None):
+    """Проверка запросов ко всем базам внутри блока with."""
+    inspector = QueryInspector(max_repeats)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
+
+
+def format_violations(request, violations) -> str:
+    lines = [f'N+1 запросы в {request.method} {request.get_full_path()}:']
+    for violation in violations:
+        reason = (
+            'ленивая загрузка связанных объектов в списке'
+            if violation['lazy'] else 'повторяющийся запрос'
+        )
+        lines.append(
+            f'{violation["field"]}: {violation["count"]} x ({reason})',
+        )
+        lines.append(f'  {violation["sql"]}')
+        lines.extend(
+            '  ' + line.rstrip()
+            for line in traceback.format_list(violation['stack'])
+        )
+    return '\n'.join(lines)
+
+
+def report(request, violations) -> None:
+    """Исключение или запись в лог по режиму STRICT_QUERIES."""
+    message = format_violations(request, violations)
+    if settings.STRICT_QUERIES == 'raise':
+        raise NPlusOneError(message)
+    metrics.incr('strict_queries_violations', len(violations))
+    logger.warning(message)
@@ -0,0 +1,49 @@
+"""Быстрый JSON-рендерер на orjson."""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer, сериализующий данные через orjson.
+
+    Результат совпадает с JSONRenderer при настройках по умолчанию
+    (компактный вывод, UNICODE_JSON): даты, Decimal и ленивые строки
+    передаются кодировщику DRF. Без orjson, с отступами или при ошибке
+    кодирования используется JSONRenderer.
+    """
+
+    options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if orjson else 0
+    )
+    default = encoders.JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context,
+            )
+        if data is None:
+            return b''
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.options)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(
+                data, accepted_media_type, renderer_context,
+            )
+        # Как и JSONRenderer, экранируем разделители строк для JavaScript.
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028',
+        ).replace(
+            '\u2029'.encode(), b'\\u2029',
+        )
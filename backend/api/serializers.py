@@ -8,10 +8,21 @@ from djoser.serializers import (
 from django.db import transaction
 from rest_framework import serializers
 from rest_framework.fields import SerializerMethodField
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework.validators import UniqueValidator
 
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from api.events import publish_recipe_changed, publish_recipe_created
+from api.fieldsets import expanded_fields, requested_fields
+from api.pantry import pantry_index
+from recipes.models import (
+    FeedEntry,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+    UsersCart,
+)
 from users.models import UserSubscription
 
 User = get_user_model()
@@ -28,6 +39,39 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
+class SparseFieldsMixin:
+    """Вывод только полей из параметров fields и expand запроса.
+
+    Применяется к сериализатору верхнего уровня при чтении. Вложенные
+    объекты из Meta.compact_fields без expand заменяются полями из
+    этого словаря.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if (
+            request is None
+            or parent is not None
+            or request.method not in SAFE_METHODS
+        ):
+            return fields
+        names = requested_fields(request, fields)
+        compact = getattr(self.Meta, 'compact_fields', {})
+        expand = expanded_fields(request, compact)
+        return {
+            name: (
+                compact[name]()
+                if name in compact and name not in expand
+                else fields[name]
+            )
+            for name in names
+        }
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор тэгов"""
 
@@ -97,13 +141,18 @@ class UserCreatorSerializer(DjoserUserCreateSerializer):
         )
 
 
-class GetUserSerializer(serializers.ModelSerializer):
+class GetUserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для получения пользователя."""
 
     is_subscribed = serializers.SerializerMethodField()
 
     def get_is_subscribed(self, obj: User) -> bool:
-        """Метод проверки подпиcки пользователя на автора."""
+        """Метод проверки подпиcки пользователя на автора.
+
+        В списках значение аннотируется запросом представления.
+        """
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context.get('request').user
         if user.is_authenticated:
             return UserSubscription.objects.filter(
@@ -139,7 +188,9 @@ class RecipePreviewSerializer(serializers.ModelSerializer):
         )
 
 
-class SubscriptionsSerializer(serializers.ModelSerializer):
+class SubscriptionsSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer,
+):
     """Сериализатор для подписок на автора."""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -159,8 +210,15 @@ class SubscriptionsSerializer(serializers.ModelSerializer):
             'recipes',
         )
 
+    @staticmethod
+    def get_recipes_limit(request) -> int:
+        """Число рецептов автора из параметра recipes_limit."""
+        return int(request.query_params.get('recipes_limit', '5'))
+
     def get_is_subscribed(self, obj) -> bool:
         """Метод проверки подписки на автора рецептов."""
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context.get('request').user
         if user.is_authenticated:
             return UserSubscription.objects.filter(
@@ -171,12 +229,17 @@ class SubscriptionsSerializer(serializers.ModelSerializer):
 
     def get_recipes_count(self, obj) -> int:
         """Метод получения количества рецептов у автора рецептов."""
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.count()
 
     def get_recipes(self, obj):
-        """Метод получения всех рецептов автора."""
-        request = self.context.get('request')
-        limit = int(request.query_params.get('recipes_limit', '5'))
+        """Метод получения всех рецептов автора.
+
+        В списке подписок рецепты загружаются заранее через
+        prefetch_related с тем же ограничением.
+        """
+        limit = self.get_recipes_limit(self.context.get('request'))
         recipes = obj.recipes.all()[:limit]
         return RecipePreviewSerializer(many=True).to_representation(
             recipes,
@@ -212,7 +275,17 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class CompactRecipeIngredientSerializer(serializers.ModelSerializer):
+    """Ингредиент в рецепте без названия и единиц измерения."""
+
+    id = serializers.ReadOnlyField(source='ingredient_id')
+
+    class Meta:
+        model = RecipeIngredient
+        fields = ('id', 'amount')
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = GetUserSerializer(read_only=True)
     ingredients = RecipeIngredientSerializer(
@@ -236,6 +309,15 @@ class RecipeSerializer(serializers.ModelSerializer):
             'text',
             'cooking_time',
         )
+        compact_fields = {
+            'tags': lambda: PrimaryKeyRelatedField(
+                many=True, read_only=True,
+            ),
+            'author': lambda: PrimaryKeyRelatedField(read_only=True),
+            'ingredients': lambda: CompactRecipeIngredientSerializer(
+                many=True, source='recipe_ingredients',
+            ),
+        }
 
     def get_is_favorited(self, obj) -> bool:
         """Метод для проверки наличия рецепта в избранном."""
@@ -304,16 +386,41 @@ class PostRecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=request.user, **validated_data)
         recipe.tags.set(tags)
         self.create_ingredients(recipe, ingredients)
+        Recipe.update_search_vector([recipe.id])
+        FeedEntry.fan_out(recipe)
+        publish_recipe_created(recipe)
+        transaction.on_commit(
+            lambda: pantry_index.refresh_recipes([recipe.id]),
+        )
         return recipe
 
     @transaction.atomic()
     def update(self, instance, validated_data):
+        ingredients = validated_data.pop('ingredients')
+        amounts = set(
+            instance.recipe_ingredients.values_list('ingredient_id', 'amount')
+        )
+        new_amounts = {
+            (ingredient['id'].id, ingredient['amount'])
+            for ingredient in ingredients
+        }
+        if {pk for pk, _ in amounts} != {pk for pk, _ in new_amounts}:
+            instance.similar_stale = True
+        if amounts != new_amounts:
+            UsersCart.bump_versions(
+                User.objects.filter(userscarts__recipe=instance),
+            )
         instance.tags.clear()
         instance.recipe_ingredients.all().delete()
         instance.tags.set(validated_data.pop('tags'))
-        ingredients = validated_data.pop('ingredients')
         self.create_ingredients(instance, ingredients)
-        return super().update(instance, validated_data)
+        recipe = super().update(instance, validated_data)
+        Recipe.update_search_vector([recipe.id])
+        publish_recipe_changed(recipe.id)
+        transaction.on_commit(
+            lambda: pantry_index.refresh_recipes([recipe.id]),
+        )
+        return recipe
 
     def to_representation(self, instance):
         return RecipeSerializer(instance, context={
@@ -0,0 +1,37 @@
+"""Кэш списка покупок по версии корзины пользователя.
+
+Версия хранится в CartVersion (UsersCart.bump_versions), поэтому текст
+по ключу с версией не устаревает, а повторное скачивание того же списка
+отвечает 304 по ETag.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+
+from recipes.models import CartVersion, Recipe
+
+
+def get_etag(user) -> str:
+    """ETag списка покупок по текущей версии корзины из основной базы."""
+    cart_version, _ = CartVersion.objects.get_or_create(user_id=user.pk)
+    return f'"cart-{user.pk}-{cart_version.version}"'
+
+
+def etag_matches(request, etag) -> bool:
+    """Совпадение с If-None-Match, в том числе со слабым ETag.
+
+    CompressionMiddleware делает ETag сжатых ответов слабым.
+    """
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return '*' in etags or etag in (
+        value[2:] if value.startswith('W/') else value for value in etags
+    )
+
+
+def get_shopping_list(user, etag) -> str:
+    key = 'shopping_list:{}'.format(etag.strip('"'))
+    text = cache.get(key)
+    if text is None:
+        text = Recipe.get_detail_recipe(user)
+        cache.set(key, text, settings.SHOPPING_LIST_CACHE_TIMEOUT)
+    return text
@@ -0,0 +1,203 @@
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api import metrics
+from api.authentication import invalidate_tokens
+from api.facets import invalidate_tags
+from api.pantry import pantry_index
+from recipes.deletion import delete_unused_images
+from recipes.models import (
+    CartVersion,
+    Favorite,
+    Ingredient,
+    ListChange,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+    UsersCart,
+)
+
+User = get_user_model()
+
+# Поля пользователя, выводимые в рецептах как автор.
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs) -> None:
+    """Учет открытых Django соединений с базой данных."""
+    metrics.incr('db_connections_created')
+
+
+@receiver(request_finished)
+def count_request(sender, **kwargs) -> None:
+    """Учет обработанных запросов."""
+    metrics.incr('requests')
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs) -> None:
+    """Сброс кэша при удалении токена, в том числе при выходе."""
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def create_cart_version(sender, instance, created, **kwargs) -> None:
+    """Строка версии списка покупок для нового пользователя."""
+    if created:
+        CartVersion.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs) -> None:
+    """Сброс кэша токенов при изменении или деактивации пользователя."""
+    if created:
+        return
+    invalidate_tokens(Token.objects.filter(user=instance).values_list(
+        'key', flat=True,
+    ))
+
+
+@receiver(pre_save, sender=User)
+def remember_old_author_fields(
+    sender, instance, update_fields, **kwargs,
+) -> None:
+    """Запоминание прежних полей автора у изменяемого пользователя."""
+    instance._old_author = None
+    if instance.pk is None or (
+        update_fields is not None
+        and not set(update_fields) & set(AUTHOR_FIELDS)
+    ):
+        return
+    instance._old_author = User.objects.filter(
+        pk=instance.pk,
+    ).values_list(*AUTHOR_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(sender, instance, **kwargs) -> None:
+    """Рецепты автора с измененным профилем попадают в /recipes/changes/."""
+    old_author = getattr(instance, '_old_author', None)
+    if old_author is None or old_author == tuple(
+        getattr(instance, name) for name in AUTHOR_FIELDS
+    ):
+        return
+    Recipe.objects.filter(author=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_from_pantry_index(sender, instance, **kwargs) -> None:
+    """Удаление рецепта из индекса поиска по продуктам."""
+    pantry_index.remove_recipe(instance.id)
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_old_image(sender, instance, update_fields, **kwargs) -> None:
+    """Запоминание прежнего изображения изменяемого рецепта."""
+    instance._old_image = None
+    if instance.pk is None or (
+        update_fields is not None and 'image' not in update_fields
+    ):
+        return
+    instance._old_image = Recipe.all_objects.filter(
+        pk=instance.pk,
+    ).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Recipe)
+def delete_replaced_image(sender, instance, **kwargs) -> None:
+    """Удаление замененного изображения, если оно больше не используется.
+
+    Недавно загруженные файлы пропускаются, их удалит cleanup_media.
+    """
+    old_image = getattr(instance, '_old_image', None)
+    if not old_image or old_image == instance.image.name:
+        return
+    transaction.on_commit(lambda: delete_unused_images([old_image]))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_facet_tags(sender, **kwargs) -> None:
+    """Сброс кэша тегов для подсчета рецептов по тегам."""
+    invalidate_tags()
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=UsersCart)
+def record_list_addition(sender, instance, created, **kwargs) -> None:
+    """Добавление рецепта в избранное или список покупок для
+    /recipes/my_changes/.
+    """
+    if created:
+        ListChange.record(
+            instance.user_id, sender, instance.recipe_id, True,
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=UsersCart)
+def record_list_removal(sender, instance, **kwargs) -> None:
+    """Удаление рецепта из избранного или списка покупок для
+    /recipes/my_changes/.
+    """
+    ListChange.record(instance.user_id, sender, instance.recipe_id, False)
+
+
+@receiver(post_save, sender=UsersCart)
+@receiver(post_delete, sender=UsersCart)
+def bump_cart_version(sender, instance, **kwargs) -> None:
+    """Новая версия списка покупок при его изменении."""
+    UsersCart.bump_versions(User.objects.filter(pk=instance.user_id))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def bump_ingredient_carts(sender, instance, **kwargs) -> None:
+    """Новая версия списков покупок с рецептами с этим ингредиентом."""
+    if kwargs.get('created'):
+        return
+    UsersCart.bump_versions(User.objects.filter(
+        userscarts__recipe__recipe_ingredients__ingredient=instance,
+    ))
+
+
+@receiver(pre_save, sender=Ingredient)
+def remember_old_ingredient_name(
+    sender, instance, update_fields, **kwargs,
+) -> None:
+    """Запоминание прежнего названия изменяемого ингредиента."""
+    instance._old_name = None
+    if instance.pk is None or (
+        update_fields is not None and 'name' not in update_fields
+    ):
+        return
+    instance._old_name = Ingredient.objects.filter(
+        pk=instance.pk,
+    ).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_search_vectors(sender, instance, **kwargs) -> None:
+    """Пересчет поисковых векторов рецептов с переименованным
+    ингредиентом. Рецепты попадают в /recipes/changes/.
+    """
+    old_name = getattr(instance, '_old_name', None)
+    if old_name is None or old_name == instance.name:
+        return
+    recipe_ids = RecipeIngredient.objects.filter(
+        ingredient=instance,
+    ).values('recipe_id')
+    Recipe.update_search_vector(recipe_ids)
+    Recipe.objects.filter(pk__in=recipe_ids).update(updated_at=timezone.now())
@@ -0,0 +1,49 @@
+"""Параметр updated_since для синхронизации изменений клиентами.
+
+Клиент передает synced_at из предыдущего ответа как updated_since и
+получает изменения начиная с этого момента. Изменения на границе могут
+прийти повторно, их применение идемпотентно.
+"""
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+SINCE_PARAM = 'updated_since'
+
+
+def get_since(request):
+    """Момент из updated_since или None для полной синхронизации."""
+    value = request.query_params.get(SINCE_PARAM)
+    if not value:
+        return None
+    try:
+        since = parse_datetime(value.replace(' ', '+'))
+    except ValueError:
+        since = None
+    if since is None:
+        raise ValidationError({SINCE_PARAM: 'Некорректная дата.'})
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    horizon = timezone.now() - timedelta(days=settings.SYNC_RETENTION_DAYS)
+    if since < horizon:
+        raise ValidationError({
+            SINCE_PARAM: 'Журнал изменений уже очищен, '
+            'нужна полная синхронизация.',
+        })
+    return since
+
+
+def get_synced_at(started) -> str:
+    """Значение updated_since для следующей синхронизации.
+
+    Отступ SYNC_MARGIN покрывает транзакции, начатые до запроса и
+    завершившиеся после выборки.
+    """
+    synced_at = started - timedelta(seconds=settings.SYNC_MARGIN)
+    return synced_at.astimezone(dt_timezone.utc).strftime(
+        '%Y-%m-%dT%H:%M:%S.%fZ',
+    )
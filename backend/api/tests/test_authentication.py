@@ -0,0 +1,52 @@
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import CachedTokenAuthentication, token_cache
+from recipes.tests.utils import create_user
+
+
+@override_settings(TOKEN_CACHE_SHARED=False, TOKEN_CACHE_LOCAL=True)
+class CachedTokenAuthenticationTests(TestCase):
+    """Кэш токенов в памяти процесса."""
+
+    def setUp(self):
+        self.user = create_user('reader')
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachedTokenAuthentication()
+        self.addCleanup(token_cache.items.clear)
+
+    def authenticate(self):
+        return self.authentication.authenticate_credentials(self.token.key)
+
+    def test_cached_user_is_new_instance_with_flags_only(self):
+        first, _ = self.authenticate()
+        with self.assertNumQueries(0):
+            second, token = self.authenticate()
+            self.assertEqual(second.pk, self.user.pk)
+            self.assertTrue(second.is_active)
+        self.assertIsNot(first, second)
+        self.assertEqual(token.key, self.token.key)
+        self.assertIn('email', second.get_deferred_fields())
+        self.assertNotIn('is_staff', second.get_deferred_fields())
+
+    def test_logout_and_deactivation_invalidate_cache(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+        self.token = Token.objects.create(user=self.user)
+        self.authenticate()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @override_settings(TOKEN_CACHE_LOCAL=False)
+    def test_no_local_cache_with_several_workers(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, ListChange, Recipe, UsersCart
+from recipes.tests.utils import create_ingredient, create_recipe, create_user
+
+
+class ListChangeTests(TestCase):
+    """Журнал изменений избранного и списка покупок."""
+
+    def setUp(self):
+        self.user = create_user('reader')
+        self.recipe = create_recipe(
+            create_user('author'),
+            ingredients=((create_ingredient('salt'), 1),),
+        )
+
+    def get_changes(self):
+        return list(ListChange.objects.filter(user=self.user).values_list(
+            'kind', 'recipe_id', 'is_added',
+        ))
+
+    def test_changes_outside_api(self):
+        for model in (Favorite, UsersCart):
+            item = model.objects.create(user=self.user, recipe=self.recipe)
+            kind = model._meta.model_name
+            self.assertIn((kind, self.recipe.pk, True), self.get_changes())
+            item.delete()
+            self.assertIn((kind, self.recipe.pk, False), self.get_changes())
+
+    def test_api_records_one_change(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/recipes/{self.recipe.pk}/favorite/'
+        self.assertEqual(client.post(url).status_code, 201)
+        self.assertEqual(
+            self.get_changes(), [('favorite', self.recipe.pk, True)],
+        )
+        self.assertEqual(client.delete(url).status_code, 204)
+        self.assertEqual(
+            self.get_changes(), [('favorite', self.recipe.pk, False)],
+        )
+
+
+class RecipeUpdatedAtTests(TestCase):
+    """Изменения, попадающие в /recipes/changes/ без сохранения рецепта."""
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.salt = create_ingredient('salt')
+        self.recipe = create_recipe(
+            self.author, ingredients=((self.salt, 1),),
+        )
+        self.past = timezone.now() - timedelta(days=1)
+        Recipe.objects.update(updated_at=self.past)
+
+    def assertTouched(self, touched=True):
+        self.recipe.refresh_from_db()
+        if touched:
+            self.assertGreater(self.recipe.updated_at, self.past)
+        else:
+            self.assertEqual(self.recipe.updated_at, self.past)
+
+    def test_ingredient_rename(self):
+        self.salt.save()
+        self.assertTouched(False)
+        self.salt.name = 'sea salt'
+        self.salt.save()
+        self.assertTouched()
+
+    def test_author_profile_edit(self):
+        self.author.last_login = timezone.now()
+        self.author.save(update_fields=['last_login'])
+        self.author.set_password('another')
+        self.author.save()
+        self.assertTouched(False)
+        self.author.first_name = 'Другое'
+        self.author.save()
+        self.assertTouched()
@@ -0,0 +1,71 @@
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.async_views import events
+from api.checks import check_events_backend
+from api.events import get_ticket_user_id, make_ticket
+from api.views import EventsTicketView
+from recipes.tests.utils import create_user
+
+
+class EventsAuthenticationTests(TestCase):
+    """Подключение к потоку событий."""
+
+    def setUp(self):
+        self.user = create_user('listener')
+        self.factory = AsyncRequestFactory()
+
+    def test_ticket_view(self):
+        request = APIRequestFactory().post('/api/events/ticket/')
+        force_authenticate(request, self.user)
+        response = EventsTicketView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            get_ticket_user_id(response.data['ticket']), self.user.pk,
+        )
+
+    async def test_ticket_in_query(self):
+        ticket = make_ticket(self.user)
+        response = await events(self.factory.get('/', {'ticket': ticket}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+    async def test_invalid_or_expired_ticket(self):
+        ticket = make_ticket(self.user)
+        for value in (ticket + 'x', 'ticket'):
+            response = await events(self.factory.get('/', {'ticket': value}))
+            self.assertEqual(response.status_code, 401)
+        with override_settings(EVENTS_TICKET_MAX_AGE=-1):
+            response = await events(self.factory.get('/', {'ticket': ticket}))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_token_not_accepted_in_query(self):
+        token = await Token.objects.acreate(user=self.user)
+        response = await events(self.factory.get('/', {'token': token.key}))
+        self.assertEqual(response.status_code, 401)
+        response = await events(self.factory.get(
+            '/', headers={'Authorization': f'Token {token.key}'},
+        ))
+        self.assertEqual(response.status_code, 200)
+
+
+class EventsBackendCheckTests(TestCase):
+    """Предупреждение о локальном бэкенде при нескольких воркерах."""
+
+    def test_local_backend_with_workers(self):
+        with override_settings(
+            WEB_CONCURRENCY=4, EVENTS_BACKEND='api.events.LocalBackend',
+        ):
+            self.assertEqual(
+                [error.id for error in check_events_backend(None)],
+                ['api.W006'],
+            )
+        with override_settings(
+            WEB_CONCURRENCY=4, EVENTS_BACKEND='api.events.PostgresBackend',
+        ):
+            self.assertEqual(check_events_backend(None), [])
+        with override_settings(
+            WEB_CONCURRENCY=1, EVENTS_BACKEND='api.events.LocalBackend',
+        ):
+            self.assertEqual(check_events_backend(None), [])
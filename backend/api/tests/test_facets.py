@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite
+from recipes.tests.utils import (
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user,
+)
+
+
+class FacetsTests(TestCase):
+    """Количество рецептов по тегам для панели фильтров."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = create_user('reader')
+        author = create_user('author')
+        salt = create_ingredient('salt')
+        self.breakfast = create_tag('breakfast', '#000001')
+        self.lunch = create_tag('lunch', '#000002')
+        self.dinner = create_tag('dinner', '#000003')
+        self.recipes = [
+            create_recipe(author, tags=tags, ingredients=((salt, 1),))
+            for tags in (
+                (self.breakfast,),
+                (self.breakfast, self.lunch),
+                (self.lunch,),
+            )
+        ]
+        Favorite.objects.create(user=self.user, recipe=self.recipes[1])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_facets(self, **params):
+        response = self.client.get('/api/recipes/facets/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def tag_counts(self, facets):
+        return {tag['slug']: tag['count'] for tag in facets['tags']}
+
+    def test_counts(self):
+        facets = self.get_facets()
+        self.assertEqual(facets['count'], 3)
+        self.assertEqual(facets['is_favorited'], 1)
+        self.assertEqual(
+            self.tag_counts(facets),
+            {'breakfast': 2, 'lunch': 2, 'dinner': 0},
+        )
+
+    def test_selected_tag_keeps_other_counts(self):
+        facets = self.get_facets(tags='breakfast')
+        self.assertEqual(facets['count'], 2)
+        self.assertEqual(
+            self.tag_counts(facets),
+            {'breakfast': 2, 'lunch': 2, 'dinner': 0},
+        )
+
+    def test_filters_restrict_tag_counts(self):
+        facets = self.get_facets(is_favorited=1)
+        self.assertEqual(
+            self.tag_counts(facets),
+            {'breakfast': 1, 'lunch': 1, 'dinner': 0},
+        )
+
+    def test_queries_do_not_depend_on_tags(self):
+        def get_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.get_facets()
+            return [query['sql'] for query in context.captured_queries]
+
+        before = get_queries()
+        for index in range(10):
+            create_tag(f'tag{index}', f'#0001{index:02}')
+        self.assertEqual(get_queries(), before)
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import FeedEntry, UserSubscription
+from recipes.tests.utils import create_recipe, create_user
+
+
+@override_settings(FEED_FANOUT_LIMIT=1)
+class FeedTests(TestCase):
+    """Лента рецептов подписок."""
+
+    url = '/api/recipes/feed/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('reader')
+        self.authors = [create_user(f'author{i}') for i in range(3)]
+        # Подписчиков больше FEED_FANOUT_LIMIT: рецепты читаются из ленты
+        # автора при запросе.
+        UserSubscription.objects.create(
+            user=create_user('follower'), author=self.authors[0],
+        )
+        self.recipes = []
+        for author in self.authors:
+            self.recipes.append(create_recipe(author))
+            UserSubscription.objects.create(user=self.user, author=author)
+            FeedEntry.subscribe(self.user, author)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_feed_merges_fanout_on_read_authors(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {recipe['id'] for recipe in response.data['results']},
+            {recipe.id for recipe in self.recipes},
+        )
+
+    def test_fanout_authors_resolved_in_one_query(self):
+        author_ids = [author.id for author in self.authors]
+        cache.clear()
+        with self.assertNumQueries(1):
+            authors = FeedEntry.fanout_on_read_authors(author_ids)
+        self.assertEqual(authors, {self.authors[0].id})
+        with self.assertNumQueries(0):
+            FeedEntry.fanout_on_read_authors(author_ids)
+
+    def test_limit_is_clamped(self):
+        for limit in ('0', '-1'):
+            response = self.client.get(self.url, {'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), 1)
+            self.assertIsNotNone(response.data['next'])
@@ -0,0 +1,61 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from api.pantry import PantryIndex, pantry_index
+from recipes.tests.utils import create_ingredient, create_recipe, create_user
+
+
+class ByPantryTests(TestCase):
+    """Поиск рецептов по имеющимся продуктам."""
+
+    url = '/api/recipes/by_pantry/'
+
+    def setUp(self):
+        self.ingredient = create_ingredient('Рис')
+        author = create_user('author')
+        for number in range(25):
+            create_recipe(
+                author,
+                name=f'Рецепт {number}',
+                ingredients=[(self.ingredient, 100)],
+            )
+        pantry_index.build()
+        self.addCleanup(setattr, pantry_index, 'built_at', None)
+
+    def test_paginated_without_limit(self):
+        response = APIClient().get(self.url, {
+            'ingredients': self.ingredient.id,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['coverage'], 1.0)
+        self.assertIsNotNone(response.data['next'])
+
+
+class PantryIndexBuildTests(SimpleTestCase):
+    """Построение индекса из нескольких потоков."""
+
+    def test_index_built_once(self):
+        index = PantryIndex()
+        calls = []
+
+        def build():
+            calls.append(threading.get_ident())
+            time.sleep(0.1)
+            index.built_at = time.monotonic()
+
+        with mock.patch.object(index, 'build', build):
+            threads = [
+                threading.Thread(target=index.ensure_fresh)
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
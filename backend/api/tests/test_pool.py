@@ -0,0 +1,53 @@
+from unittest import mock, skipUnless
+
+import psycopg2
+from django.conf import settings
+from django.core.checks import run_checks
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from backend.postgresql_pool.base import PooledDatabase
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Пул только для PostgreSQL')
+class ConnectionPoolTests(TestCase):
+    """Пул соединений backend.postgresql_pool."""
+
+    def setUp(self):
+        self.database = PooledDatabase()
+        self.conn_params = {
+            **connection.get_connection_params(),
+            'pool_size': 1,
+            'pool_timeout': 0.1,
+            'health_checks': True,
+        }
+        self.pool = self.database.get_pool(self.conn_params)
+        self.addCleanup(self.pool.closeall)
+
+    def test_exhausted_pool_waits_with_timeout(self):
+        first = self.database.connect(**self.conn_params)
+        with self.assertRaises(psycopg2.OperationalError):
+            self.database.connect(**self.conn_params)
+        self.pool.putconn(first)
+        self.assertIs(self.database.connect(**self.conn_params), first)
+
+    def test_broken_connection_replaced_on_checkout(self):
+        first = self.database.connect(**self.conn_params)
+        self.pool.putconn(first)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_terminate_backend(%s)', [first.get_backend_pid()],
+            )
+        second = self.database.connect(**self.conn_params)
+        self.assertIsNot(second, first)
+        with second.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.pool.putconn(second)
+
+    def test_pool_smaller_than_threads(self):
+        with override_settings(WEB_THREADS=4), mock.patch.dict(
+            settings.DATABASES['default'], POOL_SIZE=2, CONN_MAX_AGE=0,
+        ):
+            # Проверка настроек выполняется без --database.
+            ids = [error.id for error in run_checks()]
+        self.assertIn('api.W005', ids)
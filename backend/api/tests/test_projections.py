@@ -0,0 +1,100 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.projections import recipes_to_dicts
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeSerializer
+from recipes.models import Favorite, Recipe, UsersCart
+from recipes.tests.utils import (
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user,
+)
+from users.models import UserSubscription
+
+
+class ProjectionTests(TestCase):
+    """Проекции рецептов совпадают с RecipeSerializer побайтно."""
+
+    def setUp(self):
+        self.user = create_user('reader')
+        author = create_user('author')
+        other = create_user('other')
+        breakfast = create_tag('breakfast', '#ffaa00')
+        dinner = create_tag('dinner', '#0055ff')
+        salt = create_ingredient('Соль', 'щепотка')
+        flour = create_ingredient('Мука')
+        self.recipes = [
+            create_recipe(
+                author,
+                name='Блины',
+                tags=[breakfast, dinner],
+                ingredients=[(flour, 300), (salt, 1)],
+            ),
+            create_recipe(author, name='Каша', tags=[breakfast]),
+            create_recipe(
+                other, name='Хлеб', ingredients=[(flour, 500)], image='',
+            ),
+        ]
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        UsersCart.objects.create(user=self.user, recipe=self.recipes[1])
+        UserSubscription.objects.create(user=self.user, author=author)
+
+    def render_both(self, user, ids, params=None):
+        request = RequestFactory().get('/api/recipes/', params or {})
+        request.user = user
+        recipes = Recipe.objects.in_bulk(ids)
+        data = RecipeSerializer(
+            [recipes[pk] for pk in ids],
+            many=True,
+            context={'request': request},
+        ).data
+        return (
+            ORJSONRenderer().render(recipes_to_dicts(request, user, ids)),
+            JSONRenderer().render(data),
+        )
+
+    def test_list(self):
+        ids = [recipe.id for recipe in self.recipes]
+        for user in (self.user, AnonymousUser()):
+            projection, serializer = self.render_both(user, ids)
+            self.assertEqual(projection, serializer)
+
+    def test_detail(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for recipe in self.recipes:
+            response = client.get(f'/api/recipes/{recipe.id}/')
+            request = RequestFactory().get(f'/api/recipes/{recipe.id}/')
+            self.assertEqual(
+                ORJSONRenderer().render(
+                    recipes_to_dicts(request, self.user, [recipe.id])[0],
+                ),
+                response.content,
+            )
+
+    def test_sparse_fields(self):
+        ids = [recipe.id for recipe in self.recipes]
+        for params in (
+            {'fields': 'name,author,tags', 'expand': 'author'},
+            {'fields': 'ingredients,is_favorited'},
+            {'fields': 'tags,ingredients,author', 'expand': ''},
+            {'fields': 'image,cooking_time,text,is_in_shopping_cart'},
+        ):
+            with self.subTest(params=params):
+                projection, serializer = self.render_both(
+                    self.user, ids, params,
+                )
+                self.assertEqual(projection, serializer)
+
+    def test_list_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/recipes/', {'limit': 10})
+        ids = [recipe['id'] for recipe in response.data['results']]
+        self.assertCountEqual(ids, [recipe.id for recipe in self.recipes])
+        _, serializer = self.render_both(self.user, ids, {'limit': 10})
+        self.assertIn(serializer[1:-1], response.content)
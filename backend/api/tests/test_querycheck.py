@@ -0,0 +1,124 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from rest_framework import serializers
+
+from api.querycheck import get_fingerprint, inspect_queries
+from recipes.models import Favorite, Recipe, UsersCart
+from recipes.tests.utils import (
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user,
+)
+from users.models import UserSubscription
+
+
+class FingerprintTests(SimpleTestCase):
+    """Отпечаток запроса без значений параметров."""
+
+    def test_literals_and_in_lists(self):
+        self.assertEqual(
+            get_fingerprint(
+                "SELECT * FROM t WHERE a = 5 AND b = 'x''y' "
+                'AND c IN (%s, %s, %s)',
+            ),
+            get_fingerprint(
+                "SELECT * FROM t WHERE a = 10 AND b = 'z' AND c IN (%s, %s)",
+            ),
+        )
+
+    def test_different_queries(self):
+        self.assertNotEqual(
+            get_fingerprint('SELECT a FROM t WHERE id = 1'),
+            get_fingerprint('SELECT b FROM t WHERE id = 1'),
+        )
+
+
+class RecipesCountSerializer(serializers.ModelSerializer):
+    recipes_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Recipe._meta.get_field('author').related_model
+        fields = ('id', 'recipes_count')
+
+    def get_recipes_count(self, obj):
+        return Recipe.objects.filter(author=obj).count()
+
+
+class AuthorNameSerializer(serializers.ModelSerializer):
+    author = serializers.CharField(source='author.username')
+
+    class Meta:
+        model = Recipe
+        fields = ('id', 'author')
+
+
+class QueryInspectorTests(TestCase):
+    """Поиск повторяющихся запросов и ленивой загрузки."""
+
+    def setUp(self):
+        self.authors = [create_user(f'author{i}') for i in range(3)]
+        for author in self.authors:
+            create_recipe(author)
+
+    def test_repeated_query(self):
+        with inspect_queries(max_repeats=1) as inspector:
+            RecipesCountSerializer(self.authors, many=True).data
+        violations = inspector.violations()
+        self.assertEqual(len(violations), 1)
+        self.assertEqual(
+            violations[0]['field'], 'RecipesCountSerializer.recipes_count',
+        )
+        self.assertEqual(violations[0]['count'], 3)
+
+    def test_repeats_within_limit(self):
+        with inspect_queries(max_repeats=3) as inspector:
+            RecipesCountSerializer(self.authors, many=True).data
+        self.assertEqual(inspector.violations(), [])
+
+    def test_lazy_related_object(self):
+        recipes = list(Recipe.objects.all()[:1])
+        with inspect_queries(max_repeats=10) as inspector:
+            AuthorNameSerializer(recipes, many=True).data
+        violations = inspector.violations()
+        self.assertEqual(len(violations), 1)
+        self.assertTrue(violations[0]['lazy'])
+
+    def test_select_related_is_clean(self):
+        recipes = Recipe.objects.select_related('author')
+        with inspect_queries(max_repeats=1) as inspector:
+            AuthorNameSerializer(recipes, many=True).data
+        self.assertEqual(inspector.violations(), [])
+
+
+class CheckQueriesCommandTests(TestCase):
+    """Эндпоинты всех viewset API без N+1 запросов."""
+
+    def setUp(self):
+        self.user = create_user('reader')
+        tags = [
+            create_tag(slug, color)
+            for slug, color in (('soup', '#ff0000'), ('salad', '#00ff00'))
+        ]
+        ingredients = [create_ingredient(name) for name in ('Соль', 'Лук')]
+        for number in range(3):
+            author = create_user(f'author{number}')
+            UserSubscription.objects.create(user=self.user, author=author)
+            for index in range(2):
+                recipe = create_recipe(
+                    author,
+                    name=f'Рецепт {number}-{index}',
+                    tags=tags,
+                    ingredients=[(ingredient, 1) for ingredient in ingredients],
+                )
+                Favorite.objects.create(user=self.user, recipe=recipe)
+                UsersCart.objects.create(user=self.user, recipe=recipe)
+
+    def test_no_n_plus_one(self):
+        for args in ((), ('--user', self.user.email)):
+            with self.subTest(args=args):
+                out = StringIO()
+                call_command('check_queries', *args, stdout=out)
+                self.assertIn('N+1 запросов не найдено', out.getvalue())
@@ -0,0 +1,88 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, UsersCart
+from recipes.tests.utils import create_ingredient, create_recipe, create_user
+from users.models import UserSubscription
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN для PostgreSQL')
+class RecipeListPlanTests(TestCase):
+    """Планы запросов списков рецептов, подписок и списка покупок."""
+
+    url = '/api/recipes/'
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.reader = create_user('reader')
+        salt, rice = create_ingredient('salt'), create_ingredient('rice')
+        for number in range(10):
+            recipe = create_recipe(
+                self.author,
+                name=f'Рецепт {number}',
+                ingredients=((salt, 1), (rice, 2)),
+            )
+            UsersCart.objects.create(user=self.reader, recipe=recipe)
+        UserSubscription.objects.create(user=self.reader, author=self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def get_query(self, url, params, start, contains='LIMIT') -> str:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(start) and contains in query['sql']
+        ]
+        self.assertEqual(len(queries), 1)
+        return queries[0]
+
+    def get_page_query(self, **params) -> str:
+        return self.get_query(
+            self.url, {'limit': 6, **params}, 'SELECT "recipes_recipe"."id"',
+        )
+
+    def get_plan(self, sql, params=()) -> str:
+        with connection.cursor() as cursor:
+            # Таблицы в тесте маленькие, без запрета полного просмотра
+            # планировщик выбрал бы его при любых индексах.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def test_default_ordering_uses_pub_date_index(self):
+        plan = self.get_plan(self.get_page_query())
+        self.assertIn('recipe_pub_date_id_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_author_filter_uses_author_index(self):
+        plan = self.get_plan(self.get_page_query(author=self.author.pk))
+        self.assertIn('recipe_author_pub_date_idx', plan)
+
+    def test_subscription_recipes_use_author_index(self):
+        sql = self.get_query(
+            '/api/users/subscriptions/',
+            {'limit': 6},
+            'SELECT * FROM',
+            contains='ROW_NUMBER',
+        )
+        self.assertIn('recipe_author_pub_date_idx', self.get_plan(sql))
+
+    def test_followers_use_subscription_index(self):
+        sql, params = UserSubscription.objects.filter(
+            author=self.author,
+        ).values('user_id').query.sql_with_params()
+        self.assertIn('subscription_author_user_idx', self.get_plan(
+            sql, params,
+        ))
+
+    def test_shopping_list_uses_covering_index(self):
+        with CaptureQueriesContext(connection) as context:
+            Recipe.get_detail_recipe(self.reader)
+        (sql,) = [query['sql'] for query in context.captured_queries]
+        self.assertIn('recipe_ingredient_cover_idx', self.get_plan(sql))
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from backend.routers import ReplicaRouter
+from recipes.tests.utils import create_ingredient, create_recipe, create_user
+
+db_for_read = ReplicaRouter.db_for_read
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica'],
+    TOKEN_CACHE_SHARED=False,
+    TOKEN_CACHE_LOCAL=False,
+)
+class ReplicaRoutingTests(TestCase):
+    """Чтение своих изменений при работе с репликой."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = create_user('reader')
+        self.recipe = create_recipe(
+            create_user('author'),
+            ingredients=((create_ingredient('salt'), 1),),
+        )
+        self.client = APIClient()
+        self.reads = []
+        # Тестовая база одна: решение роутера запоминается, а запрос
+        # выполняется в default.
+        patcher = mock.patch.object(
+            ReplicaRouter, 'db_for_read', self.get_router(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_router(self):
+        def route(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            self.reads.append((model._meta.label, alias))
+            return 'default'
+
+        return route
+
+    def get_recipes(self):
+        self.reads.clear()
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        return {
+            alias for label, alias in self.reads
+            if label == 'recipes.Recipe'
+        }
+
+    def authorize(self, key):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+
+    def test_anonymous_reads_use_replica(self):
+        self.assertEqual(self.get_recipes(), {'replica'})
+
+    def test_token_is_read_from_primary(self):
+        self.authorize(Token.objects.create(user=self.user).key)
+        self.assertEqual(self.get_recipes(), {'replica'})
+        self.assertIn(('authtoken.Token', 'default'), self.reads)
+        self.assertNotIn(('authtoken.Token', 'replica'), self.reads)
+
+    def test_login_pins_issued_token(self):
+        response = self.client.post(
+            '/api/auth/token/login/',
+            {'email': self.user.email, 'password': 'password'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.authorize(response.data['auth_token'])
+        self.assertEqual(self.get_recipes(), {'default'})
+
+    def test_write_pins_client(self):
+        self.authorize(Token.objects.create(user=self.user).key)
+        self.assertEqual(self.get_recipes(), {'replica'})
+        response = self.client.post(
+            f'/api/recipes/{self.recipe.pk}/favorite/',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_recipes(), {'default'})
+
+        cache.clear()
+        self.assertEqual(self.get_recipes(), {'replica'})
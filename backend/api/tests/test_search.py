@@ -0,0 +1,32 @@
+from unittest import skipUnless
+
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.test import TestCase
+
+from recipes.models import SEARCH_CONFIG, Recipe
+from recipes.tests.utils import create_ingredient, create_recipe, create_user
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Полнотекстовый поиск')
+class SearchVectorTests(TestCase):
+    """Поисковый вектор рецепта."""
+
+    def search(self, text) -> list:
+        return list(Recipe.objects.filter(
+            search_vector=SearchQuery(text, config=SEARCH_CONFIG),
+        ).values_list('id', flat=True))
+
+    def test_ingredient_rename_updates_recipes(self):
+        ingredient = create_ingredient('Potato')
+        recipe = create_recipe(
+            create_user('author'), ingredients=[(ingredient, 3)],
+        )
+        Recipe.update_search_vector([recipe.id])
+        self.assertEqual(self.search('potato'), [recipe.id])
+
+        ingredient.name = 'Quinoa'
+        ingredient.save()
+
+        self.assertEqual(self.search('quinoa'), [recipe.id])
+        self.assertEqual(self.search('potato'), [])
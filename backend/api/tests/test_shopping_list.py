@@ -0,0 +1,51 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import UsersCart
+from recipes.tests.utils import (
+    User,
+    create_ingredient,
+    create_recipe,
+    create_user,
+)
+
+
+class ShoppingListVersionTests(TestCase):
+    """Версия списка покупок для кэша и ETag."""
+
+    url = '/api/recipes/download_shopping_cart/'
+
+    def setUp(self):
+        self.user = create_user('buyer')
+        self.recipe = create_recipe(
+            create_user('author'),
+            ingredients=[(create_ingredient('Мука'), 3)],
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(self.url, **headers)
+
+    def test_not_modified_until_cart_changes(self):
+        etag = self.download()['ETag']
+        self.assertEqual(self.download(etag).status_code, 304)
+
+        UsersCart.objects.create(user=self.user, recipe=self.recipe)
+        response = self.download(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Мука (г) - 3', response.content.decode())
+
+    def test_stale_user_save_keeps_version(self):
+        stale = User.objects.get(pk=self.user.pk)
+        etag = self.download()['ETag']
+        UsersCart.objects.create(user=self.user, recipe=self.recipe)
+        changed = self.download()['ETag']
+
+        stale.first_name = 'Другое'
+        stale.save()
+
+        self.assertNotEqual(changed, etag)
+        self.assertEqual(self.download()['ETag'], changed)
+        self.assertEqual(self.download(etag).status_code, 200)
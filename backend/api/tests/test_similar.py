@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.deletion import hide_recipes
+from recipes.models import SimilarRecipe
+from recipes.tests.utils import create_ingredient, create_recipe, create_user
+
+
+def build(*args):
+    call_command('build_similar_recipes', *args, stdout=StringIO())
+
+
+def similar_ids(recipe):
+    return list(SimilarRecipe.objects.filter(recipe=recipe).values_list(
+        'similar_id', flat=True,
+    ))
+
+
+class SimilarRecipesTests(TestCase):
+    """Похожие рецепты по набору ингредиентов."""
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.salt, self.rice, self.beans, self.onion = (
+            create_ingredient(name)
+            for name in ('Соль', 'Рис', 'Фасоль', 'Лук')
+        )
+
+    def recipe(self, *ingredients):
+        return create_recipe(
+            self.author,
+            ingredients=[(ingredient, 1) for ingredient in ingredients],
+        )
+
+    def test_missing_recipe_returns_404(self):
+        recipe = self.recipe(self.rice)
+        hide_recipes([recipe.id])
+        client = APIClient()
+        for pk in (recipe.id, recipe.id + 100):
+            response = client.get(f'/api/recipes/{pk}/similar/')
+            self.assertEqual(response.status_code, 404)
+
+    def test_common_ingredients_only_in_score(self):
+        first = self.recipe(self.salt, self.rice)
+        second = self.recipe(self.salt, self.rice)
+        third = self.recipe(self.salt, self.beans)
+
+        build('--all', '--max-posting', '2')
+
+        self.assertEqual(similar_ids(first), [second.id])
+        self.assertEqual(
+            SimilarRecipe.objects.get(recipe=first, similar=second).score,
+            1.0,
+        )
+        self.assertEqual(similar_ids(third), [])
+
+    def test_new_recipe_enters_reverse_neighbors(self):
+        first = self.recipe(self.rice, self.beans, self.onion)
+        second = self.recipe(self.rice, self.beans)
+        build('--all', '--top-k', '1')
+        self.assertEqual(similar_ids(first), [second.id])
+
+        third = self.recipe(self.rice, self.beans, self.onion)
+        build('--top-k', '1')
+
+        self.assertEqual(similar_ids(first), [third.id])
+        self.assertEqual(similar_ids(third), [first.id])
@@ -4,8 +4,12 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from api.views import (
+    EventsTicketView,
     GetUserViewSet,
     IngredientViewSet,
+    MetricsView,
+    ProfileDetailView,
+    ProfileListView,
     RecipeViewSet,
     TagViewSet,
 )
@@ -18,7 +22,48 @@ router.register('tags', TagViewSet, basename='tags')
 router.register('recipes', RecipeViewSet)
 router.register('users', GetUserViewSet, basename='users')
 
-urlpatterns = [
+urlpatterns = []
+
+if settings.ASYNC_READ_VIEWS:
+    from api import async_views
+
+    urlpatterns += [
+        path('tags/', async_views.tag_list, name='tags-list'),
+        path(
+            'tags/<int:pk>/', async_views.tag_detail, name='tags-detail',
+        ),
+        path(
+            'ingredients/',
+            async_views.ingredient_list,
+            name='ingredients-list',
+        ),
+        path(
+            'ingredients/<int:pk>/',
+            async_views.ingredient_detail,
+            name='ingredients-detail',
+        ),
+        path('recipes/', async_views.recipe_list, name='recipe-list'),
+        path(
+            'recipes/<int:pk>/',
+            async_views.recipe_detail,
+            name='recipe-detail',
+        ),
+        path('events/', async_views.events, name='events'),
+        path(
+            'events/ticket/',
+            EventsTicketView.as_view(),
+            name='events-ticket',
+        ),
+    ]
+
+urlpatterns += [
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('profiles/', ProfileListView.as_view(), name='profiles'),
+    path(
+        'profiles/<str:name>/',
+        ProfileDetailView.as_view(),
+        name='profile-detail',
+    ),
     path('', include(router.urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
@@ -1,6 +1,24 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Q,
+    Value,
+    Window,
+)
+from django.db.models.functions import RowNumber
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+)
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserViewSet
 from rest_framework import filters, permissions, status, viewsets
@@ -8,22 +26,42 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from api.filters import RecipeFilter
-from api.paginations import PageAndLimitPagination
+from api import metrics, profiling
+from api.events import make_ticket, publish_recipe_changed
+from api.facets import count_facets
+from api.fieldsets import expanded_fields, requested_fields
+from api.filters import RecipeFilter, RecipeOrderingFilter
+from api.paginations import (
+    ChangesPagination,
+    KeysetPagination,
+    PageAndLimitPagination,
+    PantryPagination,
+)
+from api.pantry import pantry_index
 from api.permissions import AuthorOrAdminOrReadOnly
+from api.projections import recipes_to_dicts
 from api.serializers import (
     GetUserSerializer,
     IngredientSerializer,
     PostRecipeSerializer,
+    RecipePreviewSerializer,
     RecipeSerializer,
     SubscriptionsSerializer,
     TagSerializer,
 )
+from api.shopping_list import etag_matches, get_etag, get_shopping_list
+from api.sync import get_since, get_synced_at
+from recipes.deletion import hide_recipes, hide_user
 from recipes.models import (
     Favorite,
+    FeedEntry,
     Ingredient,
+    ListChange,
     Recipe,
+    RecipeTombstone,
+    SimilarRecipe,
     Tag,
     UsersCart,
 )
@@ -39,6 +77,7 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    replica_read_actions = ('list', 'retrieve')
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -46,6 +85,7 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    replica_read_actions = ('list', 'retrieve')
     filter_backends = (filters.SearchFilter,)
     search_fields = ('^name',)
 
@@ -55,6 +95,34 @@ class GetUserViewSet(DjoserViewSet):
 
     pagination_class = PageAndLimitPagination
     serializer_class = GetUserSerializer
+    replica_read_actions = ('list', 'retrieve', 'subscriptions')
+
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(is_deleted=False)
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                UserSubscription.objects.filter(
+                    user=user, author=OuterRef('pk'),
+                ),
+            ))
+        return queryset
+
+    def get_instance(self):
+        """Текущий пользователь со всеми полями одним запросом.
+
+        Пользователь из кэша токенов содержит только id и флаги.
+        """
+        user = self.request.user
+        deferred = user.get_deferred_fields()
+        if deferred:
+            user.refresh_from_db(fields=deferred)
+        return user
+
+    def perform_destroy(self, instance) -> None:
+        """Скрытие пользователя; данные удаляет process_deletions."""
+        for recipe_id in hide_user(instance):
+            pantry_index.remove_recipe(recipe_id)
 
     @action(
         methods=['get'],
@@ -64,7 +132,23 @@ class GetUserViewSet(DjoserViewSet):
     )
     def subscriptions(self, request) -> Response:
         """Метод для запроса к эндпоинту subscriptions."""
-        queryset = User.objects.filter(followee__user=self.request.user)
+        limit = SubscriptionsSerializer.get_recipes_limit(request)
+        queryset = User.objects.filter(
+            followee__user=self.request.user, is_deleted=False,
+        ).annotate(
+            is_subscribed=Value(True),
+            recipes_count=Count(
+                'recipes', filter=Q(recipes__is_deleted=False),
+            ),
+        ).prefetch_related(Prefetch(
+            'recipes',
+            # Первые limit рецептов каждого автора одним запросом.
+            queryset=Recipe.objects.annotate(position=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=Recipe._meta.ordering,
+            )).filter(position__lte=limit),
+        ))
         pages = self.paginate_queryset(queryset)
         serializer = SubscriptionsSerializer(
             pages,
@@ -82,7 +166,7 @@ class GetUserViewSet(DjoserViewSet):
     def subscribe(self, request: Request, id: int) -> Response:
         """Метод для запроса к эндпоинту subscribe."""
         user = self.request.user
-        followee = get_object_or_404(User, pk=id)
+        followee = get_object_or_404(User, pk=id, is_deleted=False)
         if request.method == 'POST':
             if user != followee:
                 if not UserSubscription.objects.filter(
@@ -93,6 +177,7 @@ class GetUserViewSet(DjoserViewSet):
                         user=user,
                         author=followee,
                     )
+                    FeedEntry.subscribe(user, followee)
                     serializer = SubscriptionsSerializer(
                         followee,
                         context={'request': request},
@@ -112,18 +197,74 @@ class GetUserViewSet(DjoserViewSet):
                     author=followee,
                 )
                 subscribe.delete()
+                FeedEntry.unsubscribe(user, followee)
                 return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class MetricsView(APIView):
+    """Счетчики производительности воркера, обработавшего запрос."""
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request) -> Response:
+        return Response(metrics.snapshot())
+
+
+class EventsTicketView(APIView):
+    """Билет для подключения к потоку событий /api/events/."""
+
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request) -> Response:
+        return Response({
+            'ticket': make_ticket(request.user),
+            'expires_in': settings.EVENTS_TICKET_MAX_AGE,
+        })
+
+
+class ProfileListView(APIView):
+    """Список профилей запросов, снятых ProfilingMiddleware."""
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request) -> Response:
+        return Response([
+            {
+                **profile,
+                'url': request.build_absolute_uri(profile['name'] + '/'),
+            }
+            for profile in profiling.list_profiles()
+        ])
+
+
+class ProfileDetailView(APIView):
+    """Файл профиля или, с output=text, его текстовая сводка."""
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request, name):
+        path = profiling.get_path(name)
+        if path is None:
+            raise Http404
+        if request.query_params.get('output') == 'text':
+            return HttpResponse(
+                profiling.to_text(path), content_type='text/plain',
+            )
+        return FileResponse(open(path, 'rb'), as_attachment=True)
+
+
 class RecipeViewSet(viewsets.ModelViewSet, AddDeleteMixin):
     """Viewset для модели Recipe."""
 
     queryset = Recipe.objects.all()
     permission_classes = (AuthorOrAdminOrReadOnly,)
     pagination_class = PageAndLimitPagination
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    filter_backends = (DjangoFilterBackend, RecipeOrderingFilter)
     filterset_class = RecipeFilter
-    ordering = ('-id',)
+    # Совпадает с индексом recipe_pub_date_id_idx.
+    ordering = ('-pub_date', '-id')
+    lookup_value_regex = r'\d+'
+    replica_read_actions = ('list', 'retrieve', 'facets')
 
     # def perform_create(self, serializer: Serializer) -> None:
     #     serializer.save(author=self.request.user)
@@ -133,6 +274,42 @@ class RecipeViewSet(viewsets.ModelViewSet, AddDeleteMixin):
             return RecipeSerializer
         return PostRecipeSerializer
 
+    def perform_destroy(self, instance) -> None:
+        """Скрытие рецепта; данные удаляет process_deletions."""
+        hide_recipes([instance.id])
+        pantry_index.remove_recipe(instance.id)
+        publish_recipe_changed(instance.id, deleted=True)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'retrieve':
+            return queryset
+        fields = requested_fields(self.request, RecipeSerializer.Meta.fields)
+        expand = expanded_fields(self.request, fields)
+        if 'author' in expand:
+            queryset = queryset.select_related('author')
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in expand:
+            queryset = queryset.prefetch_related(
+                'recipe_ingredients__ingredient',
+            )
+        elif 'ingredients' in fields:
+            queryset = queryset.prefetch_related('recipe_ingredients')
+        return queryset
+
+    def list(self, request, *args, **kwargs) -> Response:
+        """Список рецептов, собранный из проекций без сериализаторов."""
+        queryset = self.filter_queryset(self.get_queryset())
+        ids = queryset.values_list('id', flat=True)
+        page = self.paginate_queryset(ids)
+        data = recipes_to_dicts(
+            request, request.user, ids if page is None else page,
+        )
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
     @action(
         methods=['get'],
         detail=False,
@@ -141,12 +318,183 @@ class RecipeViewSet(viewsets.ModelViewSet, AddDeleteMixin):
     )
     def download_shopping_cart(self, request) -> HttpResponse:
         """Метод для запроса к эндпоинту download_shopping_cart."""
-        list_ingredients = Recipe.get_detail_recipe(request.user)
-        name = 'shopping_list.txt'
-        response = HttpResponse(list_ingredients, content_type='text/plain')
-        response['Content-Disposition'] = f'attachment; filename={name}'
+        etag = get_etag(request.user)
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            list_ingredients = get_shopping_list(request.user, etag)
+            name = 'shopping_list.txt'
+            response = HttpResponse(
+                list_ingredients, content_type='text/plain',
+            )
+            response['Content-Disposition'] = f'attachment; filename={name}'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
         return response
 
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='feed',
+    )
+    def feed(self, request) -> Response:
+        """Лента рецептов авторов, на которых подписан пользователь."""
+        paginator = KeysetPagination(request)
+        keys = paginator.get_keys(
+            FeedEntry.objects.filter(user=request.user), 'recipe_id',
+        )
+        read_authors = FeedEntry.fanout_on_read_authors(
+            UserSubscription.objects.filter(
+                user=request.user,
+            ).values_list('author_id', flat=True),
+        )
+        if read_authors:
+            keys = sorted(
+                set(keys) | set(paginator.get_keys(
+                    Recipe.objects.filter(author_id__in=read_authors),
+                )),
+                reverse=True,
+            )
+        page = keys[:paginator.limit]
+        return paginator.get_paginated_response(
+            recipes_to_dicts(request, request.user, [pk for _, pk in page]),
+            page[-1] if len(keys) > paginator.limit else None,
+        )
+
+    @action(
+        methods=['get'],
+        detail=False,
+        url_path='changes',
+    )
+    def changes(self, request) -> Response:
+        """Рецепты, измененные и удаленные начиная с updated_since.
+
+        Измененные рецепты выводятся постранично по возрастанию
+        updated_at. Удаленные и synced_at для следующей синхронизации
+        выводятся на последней странице. Запрос выполняется на основной
+        базе: отставание реплики привело бы к пропуску изменений.
+        """
+        started = timezone.now()
+        since = get_since(request)
+        queryset = Recipe.objects.all()
+        if since is not None:
+            queryset = queryset.filter(updated_at__gte=since)
+        paginator = ChangesPagination(request)
+        keys = paginator.get_keys(queryset)
+        page = keys[:paginator.limit]
+        last_key = page[-1] if len(keys) > paginator.limit else None
+        response = paginator.get_paginated_response(
+            recipes_to_dicts(request, request.user, [pk for _, pk in page]),
+            last_key,
+        )
+        deleted = []
+        if last_key is None and since is not None:
+            deleted = list(RecipeTombstone.objects.filter(
+                deleted_at__gte=since,
+            ).order_by('recipe_id').values_list('recipe_id', flat=True))
+        response.data['deleted'] = deleted
+        response.data['synced_at'] = (
+            get_synced_at(started) if last_key is None else None
+        )
+        return response
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='my_changes',
+    )
+    def my_changes(self, request) -> Response:
+        """Изменения избранного и списка покупок с updated_since.
+
+        Без updated_since выводится текущее содержимое списков.
+        """
+        started = timezone.now()
+        since = get_since(request)
+        queryset = ListChange.objects.filter(user=request.user)
+        if since is None:
+            queryset = queryset.filter(is_added=True)
+        else:
+            queryset = queryset.filter(changed__gte=since)
+        data = {
+            name: {'added': [], 'removed': []}
+            for name in ('favorites', 'shopping_cart')
+        }
+        names = {
+            Favorite._meta.model_name: 'favorites',
+            UsersCart._meta.model_name: 'shopping_cart',
+        }
+        for kind, recipe_id, is_added in queryset.order_by(
+            'recipe_id',
+        ).values_list('kind', 'recipe_id', 'is_added'):
+            data[names[kind]]['added' if is_added else 'removed'].append(
+                recipe_id,
+            )
+        data['synced_at'] = get_synced_at(started)
+        return Response(data)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        url_path='facets',
+    )
+    def facets(self, request) -> Response:
+        """Количество рецептов по тегам при текущих фильтрах."""
+        return Response(count_facets(request))
+
+    @action(
+        methods=['get'],
+        detail=False,
+        url_path='by_pantry',
+        pagination_class=PantryPagination,
+    )
+    def by_pantry(self, request) -> Response:
+        """Рецепты, которые можно приготовить из имеющихся продуктов.
+
+        Параметры: ingredients - id ингредиентов через запятую,
+        min_coverage - минимальная доля ингредиентов рецепта в наличии.
+        Ответ всегда постраничный, limit по умолчанию - 20.
+        """
+        try:
+            ingredient_ids = [
+                int(pk) for pk in request.query_params.get(
+                    'ingredients', '',
+                ).split(',') if pk
+            ]
+            min_coverage = float(
+                request.query_params.get('min_coverage', 0.5),
+            )
+        except ValueError:
+            return Response(
+                {'errors': 'Некорректные параметры поиска.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        coverages = dict(self.paginate_queryset(
+            pantry_index.search(ingredient_ids, min_coverage),
+        ))
+        data = recipes_to_dicts(request, request.user, coverages)
+        for item in data:
+            item['coverage'] = round(coverages[item['id']], 4)
+        return self.get_paginated_response(data)
+
+    @action(
+        methods=['get'],
+        detail=True,
+        url_path='similar',
+    )
+    def similar(self, request, pk) -> Response:
+        """Рецепты, похожие по набору ингредиентов."""
+        similar = SimilarRecipe.objects.filter(
+            recipe=self.get_object(), similar__is_deleted=False,
+        ).select_related('similar')
+        serializer = RecipePreviewSerializer(
+            [item.similar for item in similar],
+            many=True,
+            context={'request': request},
+        )
+        return Response(serializer.data)
+
     @action(
         detail=True,
         methods=('post', 'delete'),
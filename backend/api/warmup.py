@@ -0,0 +1,60 @@
+"""Прогрев процесса перед первыми запросами.
+
+Первые запросы к новому воркеру платят за построение URLconf,
+метаданных моделей и пустые кэши. Поля сериализаторов DRF кэшируются
+в экземпляре сериализатора и строятся заново в каждом запросе, поэтому
+заранее заполняются только общие кэши _meta моделей, из которых
+ModelSerializer их строит. Шаги из
+WARMUP_STEPS выполняются в post_fork gunicorn, команда warmup
+показывает их стоимость.
+"""
+import time
+
+from django.apps import apps
+from django.urls import get_resolver
+
+from api.facets import get_tags
+from api.pantry import pantry_index
+
+
+def warm_urls() -> None:
+    resolver = get_resolver()
+    resolver.resolve('/api/')
+    # Обращение заполняет таблицы для reverse().
+    resolver.reverse_dict
+
+
+def warm_models() -> None:
+    """Заполнение кэшей полей и связей _meta всех моделей."""
+    for model in apps.get_models():
+        opts = model._meta
+        opts.get_fields()
+        opts.related_objects
+        opts.fields_map
+        opts._forward_fields_map
+
+
+def warm_catalog() -> None:
+    get_tags()
+
+
+def warm_pantry() -> None:
+    pantry_index.ensure_fresh()
+
+
+STEPS = {
+    'urls': warm_urls,
+    'models': warm_models,
+    'catalog': warm_catalog,
+    'pantry': warm_pantry,
+}
+
+
+def warm(steps=None) -> dict:
+    """Выполнение шагов прогрева, возвращает время каждого в секундах."""
+    timings = {}
+    for name in steps or STEPS:
+        started = time.perf_counter()
+        STEPS[name]()
+        timings[name] = time.perf_counter() - started
+    return timings
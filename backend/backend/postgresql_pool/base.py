@@ -0,0 +1,125 @@
+"""PostgreSQL-бэкенд с пулом соединений внутри процесса.
+
+Подключается через ``ENGINE = 'backend.postgresql_pool'`` (переменная
+окружения ``DB_POOL_SIZE``). Django при закрытии соединения возвращает
+его в пул, а при открытии берет из пула вместо нового подключения.
+
+Соединение из пула при ``CONN_HEALTH_CHECKS`` проверяется запросом
+``SELECT 1``, неработающие соединения закрываются. Если все соединения
+заняты, поток ждет свободное до ``POOL_TIMEOUT`` секунд.
+"""
+import threading
+import weakref
+
+import psycopg2
+from django.db.backends.postgresql import base
+from psycopg2.pool import ThreadedConnectionPool
+
+from api import metrics
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    """Пул с ожиданием свободного соединения и проверкой при выдаче."""
+
+    def __init__(self, maxconn, timeout, health_checks, **kwargs):
+        self.slots = threading.BoundedSemaphore(maxconn)
+        self.timeout = timeout
+        self.health_checks = health_checks
+        # Соединения, еще не выданные ни разу: их проверять не нужно.
+        self.fresh = weakref.WeakSet()
+        super().__init__(1, maxconn, **kwargs)
+
+    def _connect(self, key=None):
+        connection = super()._connect(key)
+        self.fresh.add(connection)
+        metrics.incr('db_pool_connections_opened')
+        return connection
+
+    def getconn(self, key=None):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError(
+                f'Нет свободных соединений в пуле за {self.timeout} с.',
+            )
+        try:
+            while True:
+                connection = super().getconn(key)
+                if self.is_usable(connection):
+                    return connection
+                super().putconn(connection, key, close=True)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn, key=None, close=False):
+        try:
+            super().putconn(conn, key, close=close or bool(conn.closed))
+        finally:
+            self.slots.release()
+
+    def is_usable(self, connection) -> bool:
+        if connection.closed:
+            return False
+        if connection in self.fresh:
+            self.fresh.discard(connection)
+            return True
+        if not self.health_checks:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except psycopg2.Error:
+            metrics.incr('db_pool_health_check_failures')
+            return False
+        return True
+
+
+class PooledDatabase:
+    """Обертка над модулем psycopg2, выдающая соединения из пула."""
+
+    def __init__(self):
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(psycopg2, name)
+
+    def get_pool(self, conn_params) -> ConnectionPool:
+        conn_params = dict(conn_params)
+        pool_options = {
+            'maxconn': conn_params.pop('pool_size'),
+            'timeout': conn_params.pop('pool_timeout'),
+            'health_checks': conn_params.pop('health_checks'),
+        }
+        key = repr(sorted(conn_params.items()))
+        with self.lock:
+            if key not in self.pools:
+                self.pools[key] = ConnectionPool(
+                    **pool_options, **conn_params,
+                )
+            return self.pools[key]
+
+    def connect(self, **conn_params):
+        connection = self.get_pool(conn_params).getconn()
+        metrics.incr('db_pool_checkouts')
+        return connection
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    Database = PooledDatabase()
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params['pool_size'] = self.settings_dict['POOL_SIZE']
+        conn_params['pool_timeout'] = self.settings_dict['POOL_TIMEOUT']
+        conn_params['health_checks'] = (
+            self.settings_dict['CONN_HEALTH_CHECKS']
+        )
+        return conn_params
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = self.Database.get_pool(self.get_connection_params())
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
@@ -0,0 +1,35 @@
+"""Маршрутизация чтения на реплики базы данных."""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+use_replica = ContextVar('use_replica', default=False)
+
+# Токены и сессии читаются только из основной базы: новый токен может
+# еще не дойти до реплики, и первый запрос с ним получил бы 401.
+PRIMARY_APPS = ('authtoken', 'sessions')
+
+
+class ReplicaRouter:
+    """Чтение с реплик разрешается только в рамках запросов, отмеченных
+    ReplicaRoutingMiddleware; запись и миграции всегда идут в default.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            settings.DATABASE_REPLICAS
+            and use_replica.get()
+            and model._meta.app_label not in PRIMARY_APPS
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
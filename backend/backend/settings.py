@@ -17,6 +17,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_filters',
     'rest_framework.authtoken',
     'rest_framework',
@@ -28,12 +29,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.StrictQueriesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -55,19 +60,159 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# Асинхронные представления для чтения тегов, ингредиентов и рецептов
+# и поток событий /api/events/. Включать только при запуске под
+# ASGI-сервером (uvicorn worker).
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Поток событий: api.events.LocalBackend доставляет события в пределах
+# процесса, api.events.PostgresBackend - всем воркерам через
+# LISTEN/NOTIFY. LocalBackend по умолчанию используется только при одном
+# процессе сервера: WEB_CONCURRENCY выставляет gunicorn.conf.py. Время в
+# секундах.
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+EVENTS_BACKEND = os.getenv(
+    'EVENTS_BACKEND',
+    'api.events.LocalBackend' if WEB_CONCURRENCY == 1
+    else 'api.events.PostgresBackend',
+)
+EVENTS_QUEUE_SIZE = 100
+EVENTS_KEEPALIVE = int(os.getenv('EVENTS_KEEPALIVE', 15))
+EVENTS_STREAM_TIMEOUT = int(os.getenv('EVENTS_STREAM_TIMEOUT', 600))
+EVENTS_RETRY = 5
+# Время жизни билета для подключения к потоку событий.
+EVENTS_TICKET_MAX_AGE = int(os.getenv('EVENTS_TICKET_MAX_AGE', 60))
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# DB_CONN_MAX_AGE: время жизни соединения в секундах, 0 - закрывать после
+# каждого запроса, 'None' - без ограничения.
+# DB_POOL_SIZE: размер пула соединений в процессе, 0 - без пула; должен
+# быть не меньше числа потоков воркера WEB_THREADS (выставляет
+# gunicorn.conf.py). DB_POOL_TIMEOUT: сколько секунд ждать свободное
+# соединение пула. DB_CONN_HEALTH_CHECKS проверяет соединения,
+# полученные повторно, в том числе из пула.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+WEB_THREADS = int(os.getenv('WEB_THREADS', 1))
+DB_CONN_MAX_AGE = os.getenv('DB_CONN_MAX_AGE', '0' if DB_POOL_SIZE else '60')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'backend.postgresql_pool' if DB_POOL_SIZE
+            else 'django.db.backends.postgresql'
+        ),
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'django'),
         'HOST': os.getenv('DB_HOST', 'db'),
         'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': (
+            None if DB_CONN_MAX_AGE == 'None' else int(DB_CONN_MAX_AGE)
+        ),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+        ),
+        'POOL_SIZE': DB_POOL_SIZE,
+        'POOL_TIMEOUT': DB_POOL_TIMEOUT,
+    },
+}
+
+# Реплики для чтения: DB_REPLICA_HOSTS=host1,host2:5433. Остальные
+# параметры подключения совпадают с основной базой.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1,
+):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+
+# Сколько секунд после изменений клиент читает только из основной базы.
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 5))
+
+# Лента подписок: рецепты авторов, у которых подписчиков больше
+# FEED_FANOUT_LIMIT, читаются напрямую, а не копируются в ленты.
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 10000))
+FEED_FANOUT_CACHE_TIMEOUT = 600
+FEED_BACKFILL_SIZE = 50
+
+# Период полной перестройки индекса поиска рецептов по продуктам.
+PANTRY_INDEX_TTL = int(os.getenv('PANTRY_INDEX_TTL', 300))
+
+# Популярность рецептов (update_trending): вклад добавления в избранное
+# или список покупок убывает вдвое каждые TRENDING_HALF_LIFE часов,
+# добавления старше TRENDING_WINDOW дней не учитываются.
+TRENDING_HALF_LIFE = float(os.getenv('TRENDING_HALF_LIFE', 48))
+TRENDING_WINDOW = int(os.getenv('TRENDING_WINDOW', 14))
+
+# Время жизни кэша количества рецептов по тегам для панели фильтров.
+FACETS_CACHE_TIMEOUT = int(os.getenv('FACETS_CACHE_TIMEOUT', 60))
+
+# Профилирование запросов (api.middleware.ProfilingMiddleware): запросы
+# сотрудников с заголовком PROFILING_HEADER и доля PROFILING_SAMPLE_RATE
+# остальных. Профили доступны сотрудникам через /api/profiles/.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_HEADER = 'X-Profile'
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 200))
+
+# Поиск N+1 запросов при выводе сериализаторов API (api.querycheck):
+# raise - исключение (разработка и тесты), log - предупреждение в лог
+# (staging), пустое значение - проверка выключена. Нарушение - запрос,
+# повторенный больше STRICT_QUERIES_MAX_REPEATS раз, или ленивая
+# загрузка связанных объектов при выводе элемента списка.
+STRICT_QUERIES = os.getenv('STRICT_QUERIES', '')
+STRICT_QUERIES_MAX_REPEATS = int(os.getenv('STRICT_QUERIES_MAX_REPEATS', 1))
+
+# Шаги прогрева воркера gunicorn после fork (api.warmup): urls,
+# models, catalog, pantry. Построение индекса pantry читает все
+# ингредиенты рецептов и на больших таблицах может не уложиться
+# в таймаут запуска воркера, поэтому по умолчанию выключено.
+WARMUP_STEPS = [
+    step for step in os.getenv(
+        'WARMUP_STEPS', 'urls,models,catalog',
+    ).split(',') if step
+]
+
+# Время жизни кэша текста списка покупок для версии корзины.
+SHOPPING_LIST_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_LIST_CACHE_TIMEOUT', 3600),
+)
+
+# Синхронизация изменений: удаленные рецепты и удаления из списков
+# хранятся SYNC_RETENTION_DAYS дней, более старый updated_since требует
+# полной синхронизации. SYNC_MARGIN - запас в секундах на транзакции,
+# завершившиеся после начала запроса.
+SYNC_RETENTION_DAYS = int(os.getenv('SYNC_RETENTION_DAYS', 30))
+SYNC_MARGIN = int(os.getenv('SYNC_MARGIN', 5))
+
+# Сжатие ответов API: минимальный размер тела, уровень brotli и число
+# сжатых тел, хранимых воркером для повторяющихся ответов.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))
+COMPRESSION_CACHE_SIZE = int(os.getenv('COMPRESSION_CACHE_SIZE', 256))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     },
 }
 
@@ -102,6 +247,20 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/media'
+# Изображения моложе стольких часов не удаляются даже без ссылок
+# из рецептов: их может использовать незавершенная транзакция.
+MEDIA_CLEANUP_MIN_AGE = float(os.getenv('MEDIA_CLEANUP_MIN_AGE', 24))
+
+# Загружаемые файлы называются по хэшу содержимого, nginx отдает их
+# с бессрочным кэшированием.
+STORAGES = {
+    'default': {
+        'BACKEND': 'recipes.storage.ContentHashStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
 
 AUTH_USER_MODEL = 'users.User'
 
@@ -112,13 +271,27 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'SEARCH_PARAM': 'name',
 }
 
 DEFAULT_CHARSET = 'utf-8'
 
+# Кэш токенов аутентификации: размер LRU воркера, время жизни записи
+# в секундах и использование общего кэша Django (CACHE_BACKEND должен
+# быть общим для всех воркеров, например Redis). LRU в памяти процесса
+# используется только при одном процессе сервера: WEB_CONCURRENCY
+# выставляет gunicorn.conf.py.
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 60))
+TOKEN_CACHE_SHARED = os.getenv('TOKEN_CACHE_SHARED', 'False') == 'True'
+TOKEN_CACHE_LOCAL = WEB_CONCURRENCY == 1
+
 DJOSER = {
     'PERMISSIONS': {
         'user_list': ['rest_framework.permissions.AllowAny'],
@@ -0,0 +1,145 @@
+"""Настройки gunicorn для запуска: gunicorn -c gunicorn.conf.py
+
+Все параметры задаются переменными окружения GUNICORN_*:
+GUNICORN_WORKER_CLASS - sync, gthread или uvicorn (ASGI, вместе
+с ASYNC_READ_VIEWS=True), GUNICORN_WORKERS и GUNICORN_THREADS -
+по умолчанию считаются от числа доступных контейнеру CPU.
+
+Сравнение с другой конфигурацией - benchmark_api на обоих серверах:
+python manage.py benchmark_api /api/recipes/?limit=6 -c 32 -n 2000
+"""
+import os
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def cpu_count() -> int:
+    """Число CPU с учетом квоты cgroup v2 и привязки процесса."""
+    count = len(os.sched_getaffinity(0))
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as file:
+            quota, period = file.read().split()
+        if quota != 'max':
+            count = min(count, max(1, -(-int(quota) // int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+WORKER_CLASSES = {
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+}
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+worker_class = WORKER_CLASSES.get(worker_class, worker_class)
+is_asgi = 'uvicorn' in worker_class
+
+# Синхронные воркеры ждут базу, поэтому их больше числа CPU.
+# У gthread и uvicorn ожидание перекрывается потоками и event loop.
+cpus = cpu_count()
+workers = env_int(
+    'GUNICORN_WORKERS', 2 * cpus + 1 if worker_class == 'sync' else cpus + 1,
+)
+threads = env_int('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1)
+# Число процессов и потоков для настроек приложения (TOKEN_CACHE_LOCAL,
+# EVENTS_BACKEND, проверка размера пула соединений).
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['WEB_THREADS'] = str(threads)
+
+wsgi_app = os.getenv(
+    'GUNICORN_APP',
+    'backend.asgi:application' if is_asgi else 'backend.wsgi:application',
+)
+
+# Приложение загружается в мастере до fork: воркеры стартуют быстрее
+# и делят память импортированных модулей.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Перезапуск воркера после max_requests запросов ограничивает рост
+# памяти, jitter разносит перезапуски воркеров во времени.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+# Файлы heartbeat в памяти: запись в overlayfs Docker может блокировать
+# воркер и приводить к ложным таймаутам.
+worker_tmp_dir = os.getenv(
+    'GUNICORN_WORKER_TMP_DIR',
+    '/dev/shm' if os.path.isdir('/dev/shm') else None,
+)
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+
+
+def when_ready(server):
+    """Построение URLconf и метаданных моделей в мастере до воркеров.
+
+    Шаги не обращаются к базе и кэшам, воркеры получают результат
+    при fork. Недоступность баз данных попадает в лог при старте, а не
+    при первом запросе; соединения закрываются в pre_fork.
+    """
+    if not preload_app:
+        return
+    from django.conf import settings
+
+    from api.checks import check_database_availability
+    from api.warmup import warm as warm_steps
+
+    warm_steps(['urls', 'models'])
+    for warning in check_database_availability(
+        None, databases=settings.DATABASES,
+    ):
+        server.log.warning('%s', warning)
+
+
+def pre_fork(server, worker):
+    """Закрытие соединений, открытых мастером при загрузке приложения."""
+    if not preload_app:
+        return
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_fork(server, worker):
+    """Сброс унаследованных соединений и прогрев кэшей воркера."""
+    if not preload_app:
+        return
+    from django.core.cache import caches
+    from django.db import connections
+
+    # Соединения мастера не закрываются, а отбрасываются: закрытие
+    # общего сокета в воркере оборвало бы его и в других процессах.
+    for connection in connections.all(initialized_only=True):
+        connection.connection = None
+    pools = getattr(connections['default'].Database, 'pools', None)
+    if pools is not None:
+        pools.clear()
+    caches.close_all()
+    warm(worker)
+
+
+def warm(worker):
+    """Шаги прогрева из WARMUP_STEPS до первого запроса к воркеру."""
+    from django.conf import settings
+    from django.db import close_old_connections
+
+    from api.warmup import warm as warm_steps
+
+    try:
+        timings = warm_steps(settings.WARMUP_STEPS)
+    except Exception:
+        worker.log.exception('Не удалось прогреть кэши воркера')
+    else:
+        worker.log.info('Прогрев воркера: %s', ', '.join(
+            f'{name} {elapsed * 1000:.0f} ms'
+            for name, elapsed in timings.items()
+        ))
+    finally:
+        close_old_connections()
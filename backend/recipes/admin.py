@@ -1,5 +1,11 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
+from api.events import publish_recipe_changed, publish_recipe_created
+from api.pantry import pantry_index
+from recipes.deletion import hide_recipes
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -8,10 +14,18 @@ from recipes.models import (
     Tag,
     UsersCart,
 )
+from users.admin_tools import (
+    DeferredDeleteMixin,
+    EstimatedCountPaginator,
+    input_filter,
+)
+
+User = get_user_model()
 
 
 class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Tag)
@@ -23,7 +37,7 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(DeferredDeleteMixin, admin.ModelAdmin):
     list_display = (
         'id',
         'name',
@@ -31,32 +45,81 @@ class RecipeAdmin(admin.ModelAdmin):
         'in_favorites',
     )
     readonly_fields = ('in_favorites',)
-    list_filter = ('name', 'author', 'tags')
+    list_filter = (
+        input_filter('author__username', 'автору (username)'),
+        'tags',
+    )
+    list_select_related = ('author',)
+    autocomplete_fields = ('author',)
     search_fields = ('name', 'author__username', 'tags__name')
     inlines = (RecipeIngredientInline,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
+    def get_queryset(self, request):
+        # Подзапрос выполняется только для строк текущей страницы.
+        favorites_count = Favorite.objects.filter(
+            recipe=OuterRef('pk'),
+        ).order_by().values('recipe').annotate(
+            count=Count('*'),
+        ).values('count')
+        return super().get_queryset(request).annotate(
+            favorites_count=Coalesce(Subquery(favorites_count), 0),
+        )
+
+    @admin.display(
+        description='В избранном у пользователей:',
+        ordering='favorites_count',
+    )
     def in_favorites(self, obj) -> int:
-        return obj.favorites.count()
+        return obj.favorites_count
 
-    in_favorites.short_description = 'В избранном у пользователей:'
+    def save_related(self, request, form, formsets, change) -> None:
+        super().save_related(request, form, formsets, change)
+        Recipe.update_search_vector([form.instance.pk])
+        if change:
+            UsersCart.bump_versions(
+                User.objects.filter(userscarts__recipe=form.instance),
+            )
+            publish_recipe_changed(form.instance.pk)
+        else:
+            publish_recipe_created(form.instance)
+
+    def hide(self, objs) -> None:
+        for recipe_id in hide_recipes([obj.pk for obj in objs]):
+            pantry_index.remove_recipe(recipe_id)
+            publish_recipe_changed(recipe_id, deleted=True)
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'measurement_unit')
-    list_filter = ('name',)
     search_fields = ('name',)
 
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
-    list_filter = ('user', 'recipe')
+    list_filter = (
+        input_filter('user__username', 'пользователю (username)'),
+        input_filter('recipe_id', 'рецепту (id)'),
+    )
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(UsersCart)
 class UsersCartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
-    list_filter = ('user', 'recipe')
+    list_filter = (
+        input_filter('user__username', 'пользователю (username)'),
+        input_filter('recipe_id', 'рецепту (id)'),
+    )
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,202 @@
+"""Отложенное удаление пользователей и рецептов.
+
+При удалении объект только помечается is_deleted и сразу скрывается из
+выдачи, а связанные строки удаляются командой process_deletions
+пачками по первичному ключу, без загрузки объектов в память и без
+длинных транзакций.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models, router, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (
+    FeedEntry,
+    ListChange,
+    Recipe,
+    RecipeTombstone,
+    UsersCart,
+)
+
+User = get_user_model()
+
+
+def hide_recipes(recipe_ids) -> list:
+    """Пометка рецептов удаленными.
+
+    Удаление сразу попадает в журналы синхронизации клиентов и меняет
+    версию списков покупок с этими рецептами. Рецепты убираются из лент
+    подписчиков, чтобы страницы ленты не выводились неполными.
+    """
+    Recipe.all_objects.filter(id__in=recipe_ids).update(is_deleted=True)
+    FeedEntry.objects.filter(recipe_id__in=recipe_ids).delete()
+    UsersCart.bump_versions(
+        User.objects.filter(userscarts__recipe_id__in=recipe_ids),
+    )
+    RecipeTombstone.objects.bulk_create(
+        [RecipeTombstone(recipe_id=recipe_id) for recipe_id in recipe_ids],
+        ignore_conflicts=True,
+    )
+    ListChange.objects.filter(
+        recipe_id__in=recipe_ids, is_added=True,
+    ).update(is_added=False, changed=timezone.now())
+    return list(recipe_ids)
+
+
+@transaction.atomic
+def hide_user(user) -> list:
+    """Пометка пользователя и его рецептов удаленными, выход из сессий.
+
+    Возвращает id скрытых рецептов.
+    """
+    User.objects.filter(pk=user.pk).update(is_deleted=True, is_active=False)
+    Token.objects.filter(user=user).delete()
+    return hide_recipes(list(
+        Recipe.all_objects.filter(
+            author=user, is_deleted=False,
+        ).values_list('id', flat=True)
+    ))
+
+
+def delete_in_batches(queryset, batch_size) -> int:
+    """Удаление строк выборки пачками без каскада и сигналов."""
+    model = queryset.model
+    using = router.db_for_write(model)
+    deleted = 0
+    while True:
+        pks = list(
+            queryset.using(using).values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return deleted
+        deleted += model._base_manager.filter(pk__in=pks)._raw_delete(using)
+
+
+def delete_related(model, pks, batch_size, exclude=()) -> int:
+    """Удаление строк, ссылающихся на объекты model с ключами из pks.
+
+    Учитываются и скрытые связи: автоматические промежуточные таблицы
+    ManyToManyField (Recipe.tags, User.groups) и внешние ключи
+    с related_name='+'. В базе каскадного удаления нет, поэтому
+    пропущенная связь приводит к нарушению внешнего ключа.
+    """
+    deleted = 0
+    for relation in model._meta.get_fields(include_hidden=True):
+        if not (relation.one_to_many or relation.one_to_one):
+            continue
+        if not relation.auto_created or relation.concrete:
+            continue
+        if relation.related_model in exclude:
+            continue
+        if relation.on_delete is not models.CASCADE:
+            continue
+        deleted += delete_in_batches(
+            relation.related_model._base_manager.filter(
+                **{f'{relation.field.name}__in': pks},
+            ),
+            batch_size,
+        )
+    return deleted
+
+
+def purge_recipes(batch_size):
+    """Удаление пачки помеченных рецептов и связанных строк.
+
+    Возвращает имена изображений удаленных рецептов для
+    delete_unused_images или None, если удалять нечего.
+    """
+    recipes = dict(
+        Recipe.all_objects.filter(is_deleted=True).values_list(
+            'id', 'image',
+        )[:batch_size]
+    )
+    if not recipes:
+        return None
+    delete_related(Recipe, list(recipes), batch_size)
+    delete_in_batches(Recipe.all_objects.filter(id__in=recipes), batch_size)
+    return list(recipes.values())
+
+
+def purge_users(batch_size) -> int:
+    """Удаление помеченных пользователей, чьи рецепты уже удалены."""
+    purged = 0
+    for user in User.objects.filter(is_deleted=True):
+        # Рецепты, созданные параллельно с удалением пользователя.
+        hide_user(user)
+        delete_related(User, [user.pk], batch_size, exclude=(Recipe,))
+        if Recipe.all_objects.filter(author=user).exists():
+            continue
+        delete_in_batches(User.objects.filter(pk=user.pk), batch_size)
+        purged += 1
+    return purged
+
+
+def purge_sync_log() -> int:
+    """Удаление записей синхронизации старше SYNC_RETENTION_DAYS."""
+    horizon = timezone.now() - timedelta(days=settings.SYNC_RETENTION_DAYS)
+    deleted, _ = RecipeTombstone.objects.filter(
+        deleted_at__lt=horizon,
+    ).delete()
+    removed, _ = ListChange.objects.filter(
+        is_added=False, changed__lt=horizon,
+    ).delete()
+    return deleted + removed
+
+
+def unused_images(names) -> list:
+    """Имена из names, на которые не ссылается ни один рецепт.
+
+    Файлы называются по содержимому и могут быть общими для
+    нескольких рецептов.
+    """
+    images = set(filter(None, names))
+    used = set(
+        Recipe.all_objects.filter(image__in=images).values_list(
+            'image', flat=True,
+        )
+    )
+    return sorted(images - used)
+
+
+def old_images(names, min_age=None) -> list:
+    """Имена из names, файлы которых не менялись min_age часов.
+
+    Хранилище обновляет время изменения файла при повторной загрузке
+    того же содержимого, поэтому свежий файл может принадлежать рецепту
+    из еще не зафиксированной транзакции.
+    """
+    if min_age is None:
+        min_age = settings.MEDIA_CLEANUP_MIN_AGE
+    storage = Recipe._meta.get_field('image').storage
+    deadline = timezone.now() - timedelta(hours=min_age)
+    old = []
+    for name in names:
+        try:
+            if storage.get_modified_time(name) < deadline:
+                old.append(name)
+        except OSError:
+            continue
+    return old
+
+
+def delete_images(names) -> None:
+    """Удаление файлов изображений рецептов из хранилища."""
+    storage = Recipe._meta.get_field('image').storage
+    for name in names:
+        storage.delete(name)
+
+
+def delete_unused_images(names, min_age=None) -> list:
+    """Удаление неиспользуемых файлов старше min_age часов.
+
+    Использование проверяется до возраста файла: повторная загрузка
+    обновляет время изменения раньше, чем создается строка рецепта.
+    Пропущенные свежие файлы удалит позже cleanup_media. Возвращает
+    имена удаленных файлов.
+    """
+    names = old_images(unused_images(names), min_age)
+    delete_images(names)
+    return names
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.4 on 2026-10-19 09:11
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def get_backfill_created():
+    """Время добавления существующего избранного и списков покупок.
+
+    Оно ставится за окно TRENDING_WINDOW, иначе старые записи считались
+    бы в популярности добавленными в момент миграции.
+    """
+    return timezone.now() - timedelta(days=settings.TRENDING_WINDOW + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_similar_stale_similarrecipe_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=get_backfill_created, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='userscart',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=get_backfill_created, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['created'], name='favorite_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userscart',
+            index=models.Index(fields=['created'], name='users_cart_created_idx'),
+        ),
+    ]
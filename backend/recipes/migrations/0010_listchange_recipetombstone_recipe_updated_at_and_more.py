@@ -0,0 +1,93 @@
+# Generated by Django 4.2.4 on 2026-10-19 09:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_sync_fields(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    ListChange = apps.get_model('recipes', 'ListChange')
+    Recipe.objects.update(updated_at=models.F('pub_date'))
+    for kind, model_name in (
+        ('favorite', 'Favorite'),
+        ('userscart', 'UsersCart'),
+    ):
+        model = apps.get_model('recipes', model_name)
+        ListChange.objects.bulk_create(
+            (
+                ListChange(
+                    user_id=user_id,
+                    recipe_id=recipe_id,
+                    kind=kind,
+                    is_added=True,
+                )
+                for user_id, recipe_id in model.objects.values_list(
+                    'user_id', 'recipe_id',
+                ).iterator()
+            ),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0009_recipe_is_deleted_recipe_recipe_deleted_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.BigIntegerField(db_index=True, verbose_name='id рецепта')),
+                ('kind', models.CharField(choices=[('favorite', 'избранное'), ('userscart', 'список покупок')], max_length=16, verbose_name='Список')),
+                ('is_added', models.BooleanField(verbose_name='В списке')),
+                ('changed', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'изменение списка',
+                'verbose_name_plural': 'изменения списков',
+                'ordering': ['-changed'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.BigIntegerField(unique=True, verbose_name='id рецепта')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'удаленный рецепт',
+                'verbose_name_plural': 'удаленные рецепты',
+                'ordering': ['-deleted_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['updated_at', 'id'], name='recipe_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='listchange',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='list_changes', to=settings.AUTH_USER_MODEL, verbose_name='пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='listchange',
+            index=models.Index(fields=['user', 'changed'], name='list_change_user_changed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='listchange',
+            constraint=models.UniqueConstraint(fields=('user', 'kind', 'recipe_id'), name='unique_list_change'),
+        ),
+        migrations.RunPython(fill_sync_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.4 on 2026-10-19 09:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0010_listchange_recipetombstone_recipe_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cart_version', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='версия')),
+            ],
+            options={
+                'verbose_name': 'версия списка покупок',
+                'verbose_name_plural': 'версии списков покупок',
+            },
+        ),
+    ]
@@ -1,14 +1,24 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.cache import cache
 from django.core.validators import (
     MinValueValidator,
     MaxValueValidator,
     RegexValidator
 )
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+
+from users.models import UserSubscription
 
 User = get_user_model()
 
+# Конфигурация полнотекстового поиска, соответствует LANGUAGE_CODE.
+SEARCH_CONFIG = 'russian'
+
 
 class Ingredient(models.Model):
     """Модель для ингредиентов в рецепте."""
@@ -70,14 +80,23 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeManager(models.Manager):
+    """Рецепты без удаленных, ожидающих очистки (process_deletions)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Recipe(models.Model):
     """Модель рецептов."""
 
+    # Выборки по автору обслуживает recipe_author_pub_date_idx.
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='recipes',
         verbose_name='Автор',
+        db_index=False,
     )
     name = models.CharField(
         'Название рецепта',
@@ -116,22 +135,100 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True,
-        db_index=True,
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+    )
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+    similar_stale = models.BooleanField(
+        'Похожие рецепты требуют пересчета',
+        default=True,
+        editable=False,
+    )
+    trending_score = models.FloatField(
+        'Популярность',
+        default=0,
+        editable=False,
+    )
+    is_deleted = models.BooleanField(
+        'Удален',
+        default=False,
+        editable=False,
+    )
+
+    objects = RecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
         verbose_name = 'рецепт'
         verbose_name_plural = 'рецепты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx',
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx',
+            ),
+            models.Index(
+                fields=['-trending_score', '-id'],
+                name='recipe_trending_idx',
+            ),
+            models.Index(
+                fields=['id'],
+                condition=Q(is_deleted=True),
+                name='recipe_deleted_idx',
+            ),
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='recipe_updated_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
 
+    @staticmethod
+    def update_search_vector(recipe_ids):
+        """Пересчет поискового вектора по названию, описанию и
+        названиям ингредиентов рецептов.
+        """
+        ingredient_names = (
+            RecipeIngredient.objects.filter(recipe=OuterRef('pk'))
+            .order_by()
+            .values('recipe')
+            .annotate(names=StringAgg('ingredient__name', ' '))
+            .values('names')
+        )
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            search_vector=(
+                SearchVector('name', weight='A', config=SEARCH_CONFIG)
+                + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+                + SearchVector(
+                    Subquery(ingredient_names),
+                    weight='C',
+                    config=SEARCH_CONFIG,
+                )
+            ),
+        )
+
     @staticmethod
     def get_detail_recipe(user):
         ingredients = (
             RecipeIngredient.objects.filter(
                 recipe__userscarts__user=user,
+                recipe__is_deleted=False,
             )
             .order_by('ingredient__name')
             .values(
@@ -154,12 +251,14 @@ class Recipe(models.Model):
 class RecipeIngredient(models.Model):
     """Модель для количества ингредиентов в рецептах."""
 
+    # Выборки по рецепту обслуживают unique_recipe_ingredient
+    # и recipe_ingredient_cover_idx.
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         related_name='recipe_ingredients',
         verbose_name='Рецепт',
-        db_index=True,
+        db_index=False,
     )
     ingredient = models.ForeignKey(
         Ingredient,
@@ -190,6 +289,15 @@ class RecipeIngredient(models.Model):
                 name='unique_recipe_ingredient',
             ),
         ]
+        indexes = [
+            # Покрывающий индекс для суммирования ингредиентов в списке
+            # покупок: выборка по рецепту без чтения строк таблицы.
+            models.Index(
+                fields=['recipe'],
+                include=['ingredient', 'amount'],
+                name='recipe_ingredient_cover_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.ingredient.name
@@ -208,6 +316,10 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
         verbose_name='рецепт',
     )
+    created = models.DateTimeField(
+        'Дата добавления',
+        auto_now_add=True,
+    )
 
     class Meta:
         ordering = ['-id']
@@ -219,6 +331,9 @@ class Favorite(models.Model):
                 name='unique_favorite',
             ),
         ]
+        indexes = [
+            models.Index(fields=['created'], name='favorite_created_idx'),
+        ]
         default_related_name = 'favorites'
 
     def __str__(self) -> str:
@@ -240,6 +355,10 @@ class UsersCart(models.Model):
         on_delete=models.CASCADE,
         verbose_name='рецепт',
     )
+    created = models.DateTimeField(
+        'Дата добавления',
+        auto_now_add=True,
+    )
 
     class Meta:
         ordering = ['-id']
@@ -251,9 +370,282 @@ class UsersCart(models.Model):
                 name='unique_users_cart',
             ),
         ]
+        indexes = [
+            models.Index(fields=['created'], name='users_cart_created_idx'),
+        ]
         default_related_name = 'userscarts'
 
     def __str__(self) -> str:
         user = self.user.username
         recipe = self.recipe.name
         return f'{user} добавил {recipe} в список покупок.'
+
+    @staticmethod
+    def bump_versions(users) -> None:
+        """Новая версия списка покупок пользователей из выборки users.
+
+        Вызывается при изменении состава списка, ингредиентов рецептов
+        в нем и самих ингредиентов.
+        """
+        CartVersion.objects.filter(
+            user__in=users.values('pk'),
+        ).update(version=F('version') + 1)
+
+
+class CartVersion(models.Model):
+    """Версия списка покупок пользователя для кэша и ETag.
+
+    Хранится отдельно от User: полное сохранение устаревшего объекта
+    пользователя (смена пароля, PUT /users/me/) не должно возвращать
+    версию назад. Изменяется только через update().
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='cart_version',
+        verbose_name='пользователь',
+    )
+    version = models.PositiveBigIntegerField('версия', default=0)
+
+    class Meta:
+        verbose_name = 'версия списка покупок'
+        verbose_name_plural = 'версии списков покупок'
+
+    def __str__(self) -> str:
+        return f'{self.user_id}: {self.version}'
+
+
+class FeedEntry(models.Model):
+    """Запись ленты рецептов от авторов, на которых подписан пользователь.
+
+    Лента заполняется при публикации рецепта (fan-out on write). Рецепты
+    авторов с числом подписчиков больше FEED_FANOUT_LIMIT в ленту не
+    копируются и подмешиваются при чтении.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='рецепт',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ['-pub_date', '-recipe']
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'лента подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_user_pub_date_idx',
+            ),
+        ]
+        default_related_name = 'feed_entries'
+
+    def __str__(self) -> str:
+        return f'{self.recipe_id} в ленте {self.user_id}'
+
+    @staticmethod
+    def is_fanout_on_read(author_id) -> bool:
+        """Автор со слишком большим числом подписчиков для fan-out."""
+        return author_id in FeedEntry.fanout_on_read_authors([author_id])
+
+    @staticmethod
+    def fanout_on_read_authors(author_ids) -> set:
+        """Авторы из author_ids, рецепты которых читаются при запросе.
+
+        Авторы без значения в кэше проверяются одним запросом
+        с группировкой подписок.
+        """
+        keys = {
+            f'feed_fanout_on_read:{author_id}': author_id
+            for author_id in author_ids
+        }
+        results = cache.get_many(keys)
+        missing = [
+            author_id for key, author_id in keys.items()
+            if key not in results
+        ]
+        if missing:
+            large = set(
+                UserSubscription.objects.filter(author_id__in=missing)
+                .values('author_id')
+                .annotate(followers=Count('id'))
+                .filter(followers__gt=settings.FEED_FANOUT_LIMIT)
+                .values_list('author_id', flat=True)
+            )
+            computed = {
+                f'feed_fanout_on_read:{author_id}': author_id in large
+                for author_id in missing
+            }
+            cache.set_many(computed, settings.FEED_FANOUT_CACHE_TIMEOUT)
+            results.update(computed)
+        return {keys[key] for key, value in results.items() if value}
+
+    @staticmethod
+    def fan_out(recipe):
+        """Добавление нового рецепта в ленты подписчиков автора."""
+        if FeedEntry.is_fanout_on_read(recipe.author_id):
+            return
+        follower_ids = UserSubscription.objects.filter(
+            author_id=recipe.author_id,
+        ).values_list('user_id', flat=True)
+        FeedEntry.objects.bulk_create(
+            (
+                FeedEntry(
+                    user_id=user_id, recipe=recipe, pub_date=recipe.pub_date,
+                )
+                for user_id in follower_ids.iterator()
+            ),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def subscribe(user, author):
+        """Добавление в ленту последних рецептов нового автора."""
+        if FeedEntry.is_fanout_on_read(author.id):
+            return
+        recipes = Recipe.objects.filter(author=author).values_list(
+            'id', 'pub_date',
+        )[:settings.FEED_BACKFILL_SIZE]
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(user=user, recipe_id=recipe_id, pub_date=pub_date)
+                for recipe_id, pub_date in recipes
+            ],
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def unsubscribe(user, author):
+        """Удаление из ленты рецептов автора."""
+        FeedEntry.objects.filter(user=user, recipe__author=author).delete()
+
+
+class SimilarRecipe(models.Model):
+    """Рецепт, похожий по набору ингредиентов (build_similar_recipes)."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='рецепт',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='похожий рецепт',
+    )
+    score = models.FloatField('Коэффициент Жаккара')
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'похожий рецепт'
+        verbose_name_plural = 'похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similar_recipe_score_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.similar_id} похож на {self.recipe_id}'
+
+
+class RecipeTombstone(models.Model):
+    """Удаленный рецепт для синхронизации изменений клиентами.
+
+    Хранится SYNC_RETENTION_DAYS дней, после чего очищается
+    process_deletions.
+    """
+
+    recipe_id = models.BigIntegerField('id рецепта', unique=True)
+    deleted_at = models.DateTimeField(
+        'Дата удаления',
+        auto_now_add=True,
+        db_index=True,
+    )
+
+    class Meta:
+        ordering = ['-deleted_at']
+        verbose_name = 'удаленный рецепт'
+        verbose_name_plural = 'удаленные рецепты'
+
+    def __str__(self) -> str:
+        return f'{self.recipe_id} удален'
+
+
+class ListChange(models.Model):
+    """Последнее изменение рецепта в избранном или списке покупок.
+
+    Для пары пользователь - рецепт хранится одна строка с текущим
+    состоянием, поэтому журнал не растет с числом добавлений и удалений.
+    """
+
+    KINDS = (
+        ('favorite', 'избранное'),
+        ('userscart', 'список покупок'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='list_changes',
+        verbose_name='пользователь',
+    )
+    recipe_id = models.BigIntegerField('id рецепта', db_index=True)
+    kind = models.CharField('Список', max_length=16, choices=KINDS)
+    is_added = models.BooleanField('В списке')
+    changed = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        ordering = ['-changed']
+        verbose_name = 'изменение списка'
+        verbose_name_plural = 'изменения списков'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'kind', 'recipe_id'],
+                name='unique_list_change',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'changed'],
+                name='list_change_user_changed_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.recipe_id} в списке {self.kind} {self.user_id}'
+
+    @staticmethod
+    def record(user_id, model, recipe_id, is_added) -> None:
+        """Запись добавления или удаления рецепта из списка model."""
+        ListChange.objects.update_or_create(
+            user_id=user_id,
+            kind=model._meta.model_name,
+            recipe_id=recipe_id,
+            defaults={'is_added': is_added},
+        )
@@ -0,0 +1,37 @@
+"""Хранилище файлов с именами по содержимому."""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentHashStorage(FileSystemStorage):
+    """Файлы называются по sha256 содержимого.
+
+    Одинаковые загрузки сохраняются в один файл, а содержимое по
+    одному адресу никогда не меняется, поэтому файлы можно отдавать
+    с бессрочным кэшированием. При повторной загрузке обновляется время
+    изменения файла: очистка не удаляет файлы моложе
+    MEDIA_CLEANUP_MIN_AGE, пока транзакция рецепта не завершена.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+    @staticmethod
+    def hashed_name(name, content) -> str:
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        directory, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, digest.hexdigest() + ext)
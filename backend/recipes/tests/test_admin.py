@@ -0,0 +1,42 @@
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.tests.utils import create_recipe, create_user
+
+
+@skipUnless(connection.vendor == 'postgresql', 'pg_class для PostgreSQL')
+@mock.patch('users.admin_tools.ESTIMATED_COUNT_THRESHOLD', 0)
+class EstimatedCountTests(TestCase):
+    """Оценка числа строк в списках админки."""
+
+    def setUp(self):
+        admin = create_user('admin', is_staff=True, is_superuser=True)
+        create_recipe(create_user('author'))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE recipes_recipe, users_user')
+        self.client.force_login(admin)
+
+    def get_counts(self, url, params=None) -> list:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return [
+            query['sql'] for query in context.captured_queries
+            if 'reltuples' in query['sql']
+            or query['sql'].startswith('SELECT COUNT(*)')
+        ]
+
+    def test_unfiltered_lists_use_estimate(self):
+        for url in ('/admin/recipes/recipe/', '/admin/users/user/'):
+            with self.subTest(url=url):
+                counts = self.get_counts(url)
+                self.assertEqual(len(counts), 1)
+                self.assertIn('reltuples', counts[0])
+
+    def test_filtered_list_is_counted(self):
+        counts = self.get_counts('/admin/recipes/recipe/', {'q': 'Рецепт'})
+        self.assertEqual(len(counts), 1)
+        self.assertIn('COUNT(*)', counts[0])
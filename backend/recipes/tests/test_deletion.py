@@ -0,0 +1,156 @@
+import os
+import tempfile
+import time
+
+from django.contrib import admin
+from django.contrib.auth.models import Group
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from recipes.deletion import (
+    delete_unused_images,
+    hide_recipes,
+    hide_user,
+    purge_recipes,
+    purge_users,
+)
+from recipes.models import (
+    FeedEntry,
+    Recipe,
+    RecipeIngredient,
+    SimilarRecipe,
+    Tag,
+)
+from recipes.tests.utils import (
+    User,
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user,
+)
+from users.admin_tools import DeferredDeleteMixin
+from users.models import UserSubscription
+
+
+class PurgeTests(TestCase):
+    """Удаление помеченных объектов вместе со связанными строками."""
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.tag = create_tag('breakfast', '#ffffff')
+        self.ingredient = create_ingredient('Соль')
+
+    def test_purge_tagged_recipe(self):
+        recipe = create_recipe(
+            self.author, tags=[self.tag], ingredients=[(self.ingredient, 2)],
+        )
+        other = create_recipe(self.author, name='Другой', tags=[self.tag])
+        SimilarRecipe.objects.create(
+            recipe=other, similar=recipe, score=0.5,
+        )
+        hide_recipes([recipe.id])
+
+        purge_recipes(batch_size=10)
+
+        self.assertFalse(Recipe.all_objects.filter(id=recipe.id).exists())
+        self.assertFalse(
+            Recipe.tags.through.objects.filter(recipe_id=recipe.id).exists(),
+        )
+        self.assertFalse(
+            RecipeIngredient.objects.filter(recipe_id=recipe.id).exists(),
+        )
+        self.assertFalse(
+            SimilarRecipe.objects.filter(similar_id=recipe.id).exists(),
+        )
+        self.assertTrue(Tag.objects.filter(id=self.tag.id).exists())
+        self.assertEqual(list(other.tags.all()), [self.tag])
+        self.assertIsNone(purge_recipes(batch_size=10))
+
+    def test_purge_user_in_group(self):
+        group = Group.objects.create(name='editors')
+        self.author.groups.add(group)
+        create_recipe(self.author, tags=[self.tag])
+        hide_user(self.author)
+
+        purge_recipes(batch_size=10)
+        self.assertEqual(purge_users(batch_size=10), 1)
+
+        self.assertFalse(User.objects.filter(id=self.author.id).exists())
+        self.assertFalse(
+            User.groups.through.objects.filter(
+                user_id=self.author.id,
+            ).exists(),
+        )
+        self.assertTrue(Group.objects.filter(id=group.id).exists())
+
+    def test_hidden_recipe_leaves_feeds(self):
+        reader = create_user('reader')
+        recipe = create_recipe(self.author)
+        kept = create_recipe(self.author, name='Другой')
+        UserSubscription.objects.create(user=reader, author=self.author)
+        FeedEntry.subscribe(reader, self.author)
+
+        hide_recipes([recipe.id])
+
+        self.assertEqual(
+            list(FeedEntry.objects.filter(user=reader).values_list(
+                'recipe_id', flat=True,
+            )),
+            [kept.id],
+        )
+
+
+class DeferredDeleteMixinTests(SimpleTestCase):
+    """Проверка админки с отложенным удалением."""
+
+    def test_hide_is_required(self):
+        class RecipeAdmin(DeferredDeleteMixin, admin.ModelAdmin):
+            pass
+
+        errors = RecipeAdmin(Recipe, admin.site).check()
+        self.assertEqual([error.id for error in errors], ['users.E001'])
+
+
+class DeleteUnusedImagesTests(TestCase):
+    """Удаление изображений, на которые не ссылаются рецепты."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.storage = Recipe._meta.get_field('image').storage
+        self.author = create_user('author')
+
+    def save_image(self, content, age=48):
+        name = self.storage.save(
+            'images_for_recipes/image.png', ContentFile(content),
+        )
+        modified = time.time() - age * 3600
+        os.utime(self.storage.path(name), (modified, modified))
+        return name
+
+    def test_deletes_only_old_unused_images(self):
+        unused = self.save_image(b'unused')
+        used = self.save_image(b'used')
+        fresh = self.save_image(b'fresh', age=1)
+        create_recipe(self.author, image=used)
+
+        deleted = delete_unused_images([unused, used, fresh])
+
+        self.assertEqual(deleted, [unused])
+        self.assertFalse(self.storage.exists(unused))
+        self.assertTrue(self.storage.exists(used))
+        self.assertTrue(self.storage.exists(fresh))
+
+    def test_reused_image_is_kept(self):
+        name = self.save_image(b'shared')
+        # Тот же файл загружен для рецепта, транзакция которого еще
+        # не завершена.
+        self.storage.save(
+            'images_for_recipes/other.png', ContentFile(b'shared'),
+        )
+
+        self.assertEqual(delete_unused_images([name]), [])
+        self.assertTrue(self.storage.exists(name))
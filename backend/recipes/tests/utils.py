@@ -0,0 +1,41 @@
+"""Создание объектов для тестов."""
+from django.contrib.auth import get_user_model
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+User = get_user_model()
+
+
+def create_user(username, **kwargs):
+    return User.objects.create_user(
+        email=f'{username}@example.com',
+        username=username,
+        first_name='Имя',
+        last_name='Фамилия',
+        password='password',
+        **kwargs,
+    )
+
+
+def create_tag(slug, color):
+    return Tag.objects.create(name=slug, slug=slug, color=color)
+
+
+def create_ingredient(name, measurement_unit='г'):
+    return Ingredient.objects.create(
+        name=name, measurement_unit=measurement_unit,
+    )
+
+
+def create_recipe(author, name='Рецепт', tags=(), ingredients=(), **kwargs):
+    """Рецепт с тегами и парами (ингредиент, количество)."""
+    kwargs.setdefault('text', 'Описание')
+    kwargs.setdefault('cooking_time', 10)
+    kwargs.setdefault('image', 'images_for_recipes/test.png')
+    recipe = Recipe.objects.create(author=author, name=name, **kwargs)
+    recipe.tags.set(tags)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=amount)
+        for ingredient, amount in ingredients
+    )
+    return recipe
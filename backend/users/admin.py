@@ -1,11 +1,18 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as AuthUserAdmin
 
+from api.pantry import pantry_index
+from recipes.deletion import hide_user
+from users.admin_tools import (
+    DeferredDeleteMixin,
+    EstimatedCountPaginator,
+    input_filter,
+)
 from users.models import User, UserSubscription
 
 
 @admin.register(User)
-class CustomUserAdmin(AuthUserAdmin):
+class CustomUserAdmin(DeferredDeleteMixin, AuthUserAdmin):
     list_display = (
         'first_name',
         'last_name',
@@ -14,8 +21,8 @@ class CustomUserAdmin(AuthUserAdmin):
         'password',
     )
     list_filter = (
-        'username',
-        'email',
+        input_filter('username', 'username'),
+        input_filter('email', 'email'),
     )
     search_fields = (
         'first_name',
@@ -23,10 +30,27 @@ class CustomUserAdmin(AuthUserAdmin):
         'username',
         'email',
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(is_deleted=False)
+
+    def hide(self, objs) -> None:
+        for user in objs:
+            for recipe_id in hide_user(user):
+                pantry_index.remove_recipe(recipe_id)
 
 
 @admin.register(UserSubscription)
 class UserSubscriptionAdmin(admin.ModelAdmin):
     list_display = ('user', 'author')
-    list_filter = ('user', 'author')
+    list_filter = (
+        input_filter('user__username', 'подписчику (username)'),
+        input_filter('author__username', 'автору (username)'),
+    )
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
     search_fields = ('user__username', 'author__username')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,129 @@
+"""Общие инструменты админки для больших таблиц."""
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core import checks
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Начиная с этого числа строк вместо COUNT(*) используется оценка
+# из статистики PostgreSQL.
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, не считающий строки таблицы без фильтров.
+
+    Для списка без условий число строк берется из pg_class.reltuples,
+    отфильтрованные списки считаются обычным COUNT. Условие
+    is_deleted=False фильтром не считается: оценка включает немногие
+    помеченные удаленными строки.
+    """
+
+    @staticmethod
+    def is_unfiltered(queryset) -> bool:
+        where = queryset.query.where
+        if not where:
+            return True
+        model = queryset.model
+        fields = {field.name for field in model._meta.get_fields()}
+        return 'is_deleted' in fields and where == model._base_manager.filter(
+            is_deleted=False,
+        ).query.where
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if (
+            connection.vendor == 'postgresql'
+            and self.is_unfiltered(queryset)
+        ):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE relname = %s',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class InputFilter(admin.SimpleListFilter):
+    """Фильтр с полем ввода вместо списка всех возможных значений."""
+
+    template = 'admin/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        # Непустой список нужен, чтобы фильтр отображался.
+        return ((None, None),)
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(
+                remove=[self.parameter_name],
+            ),
+            'query_parts': [
+                (name, value)
+                for name, value in changelist.params.items()
+                if name != self.parameter_name
+            ],
+        }
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            return queryset.filter(**{self.lookup: self.value().strip()})
+        except (ValueError, ValidationError) as error:
+            raise IncorrectLookupParameters(error)
+
+
+class DeferredDeleteMixin:
+    """Удаление из админки через пометку is_deleted.
+
+    Связанные объекты удаляются в фоне, поэтому страница подтверждения
+    не собирает их список. Подклассы обязаны определить hide(objs),
+    иначе админка не пройдет проверку при запуске.
+    """
+
+    hide = None
+
+    def check(self, **kwargs):
+        errors = super().check(**kwargs)
+        if not callable(self.hide):
+            errors.append(checks.Error(
+                f'{type(self).__name__} должен определять метод hide(objs).',
+                obj=type(self),
+                id='users.E001',
+            ))
+        return errors
+
+    def delete_model(self, request, obj) -> None:
+        self.hide([obj])
+
+    def delete_queryset(self, request, queryset) -> None:
+        self.hide(list(queryset))
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        opts = self.model._meta
+        count = {
+            opts.verbose_name_plural if len(objs) > 1
+            else opts.verbose_name: len(objs),
+        }
+        return [str(obj) for obj in objs], count, set(), []
+
+
+def input_filter(lookup, title):
+    """Класс InputFilter по значению поля lookup."""
+    return type(
+        f'{lookup}_filter',
+        (InputFilter,),
+        {'title': title, 'parameter_name': lookup, 'lookup': lookup},
+    )
@@ -24,6 +24,11 @@ class User(AbstractUser):
         null=False,
     )
     username = models.CharField('пользователь', max_length=150, unique=True)
+    is_deleted = models.BooleanField(
+        'удален',
+        default=False,
+        editable=False,
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username']
@@ -35,6 +40,13 @@ class User(AbstractUser):
         ordering = ['id']
         verbose_name = 'пользователь'
         verbose_name_plural = 'пользователи'
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(is_deleted=True),
+                name='user_deleted_idx',
+            ),
+        ]
 
 
 class UserSubscription(models.Model):
@@ -51,6 +63,7 @@ class UserSubscription(models.Model):
         on_delete=models.CASCADE,
         related_name='followee',
         verbose_name='автор',
+        db_index=False,
     )
 
     class Meta:
@@ -62,6 +75,12 @@ class UserSubscription(models.Model):
                 fields=['user', 'author'], name='unique_subscription',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='subscription_author_user_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.user} оформил подписку на {self.author}.'